@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Compare MILP backends on the Stage 2 assignment problem across N values.
+
+For each N, this script runs Stage 1 (PCA + clustering) once, builds the
+assignment MILP once in solver-neutral form, and hands the same model to
+every installed backend (HiGHS via scipy, HiGHS via highspy, OR-Tools
+CP-SAT, CBC via PuLP). Each backend runs in its own worker process, so
+solver libraries never share a process and timings exclude imports.
+
+Usage:
+    python scripts/benchmark_backends.py --output backend_results.csv
+    python scripts/benchmark_backends.py --backends scipy highspy --time-limit 10
+
+Outputs:
+    - CSV file with columns: n, n_supergeos, backend, trial, status,
+      solve_seconds, objective, smd_cost
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import osd module
+THIS_DIR = Path(__file__).parent
+PROJECT_ROOT = THIS_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.utils.synthetic_data import generate_synthetic_data
+from osd.design.candidate_generation import CandidateGenerator
+from osd.design.solver import SupergeoSolver
+from osd.design.backends import BACKENDS, available_backends, get_backend
+
+
+def solve_with_backend(backend_name, model, time_limit):
+    """Worker: solve a prebuilt MILPModel and time only the backend call."""
+    backend = get_backend(backend_name)
+    start = time.perf_counter()
+    result = backend.solve(model, time_limit)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare MILP backends for the OSD assignment problem"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="backend_results.csv",
+        help="Output CSV file path"
+    )
+    parser.add_argument(
+        "--n-values",
+        type=int,
+        nargs="+",
+        default=[50, 100, 200, 400, 800, 1000],
+        help="List of N values to benchmark (same defaults as benchmark_scalability.py)"
+    )
+    parser.add_argument(
+        "--backends",
+        type=str,
+        nargs="+",
+        default=None,
+        help=f"Backends to compare (default: all installed of {sorted(BACKENDS)})"
+    )
+    parser.add_argument(
+        "--n-trials",
+        type=int,
+        default=3,
+        help="Number of trials (datasets) per N"
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=30.0,
+        help="Per-solve time limit in seconds"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Random seed for reproducibility"
+    )
+
+    args = parser.parse_args()
+    backends = args.backends or available_backends()
+
+    print("OSD MILP Backend Benchmark")
+    print("=" * 60)
+    print(f"N values: {args.n_values}")
+    print(f"Backends: {backends}")
+    print(f"Trials per N: {args.n_trials}")
+    print(f"Time limit: {args.time_limit}s")
+    print("=" * 60)
+    print()
+
+    # One long-lived spawned worker per backend keeps solver libraries isolated
+    spawn = multiprocessing.get_context("spawn")
+    pools = {name: ProcessPoolExecutor(max_workers=1, mp_context=spawn) for name in backends}
+
+    results = []
+    try:
+        for n in args.n_values:
+            for trial in range(args.n_trials):
+                units = generate_synthetic_data(
+                    n_units=n,
+                    effect_size=0.1,
+                    heterogeneity=0.5,
+                    spatial_confounding=0.2,
+                    seed=args.seed + trial
+                )
+                generator = CandidateGenerator(units, method='pca')
+                n_supergeos = max(4, int(n * 0.1))  # 10% of N
+                supergeos = generator.generate_supergeos(n_supergeos=n_supergeos)
+
+                n_treatment = int(n_supergeos / 2)
+                n_control = n_supergeos - n_treatment
+                solver = SupergeoSolver(supergeos)
+                model = solver.build_model(n_treatment, n_control)
+
+                for name in backends:
+                    print(f"N={n} trial={trial} backend={name}...", end=" ", flush=True)
+                    try:
+                        result, seconds = pools[name].submit(
+                            solve_with_backend, name, model, args.time_limit
+                        ).result()
+                    except Exception as e:
+                        print(f"✗ Failed: {e}")
+                        continue
+
+                    if result.has_solution:
+                        treatment_indices = np.flatnonzero(result.x[:solver.n] > 0.5).tolist()
+                        smd_cost = solver._evaluate_cost(treatment_indices)
+                    else:
+                        smd_cost = np.nan
+
+                    results.append({
+                        "n": n,
+                        "n_supergeos": len(supergeos),
+                        "backend": name,
+                        "trial": trial,
+                        "status": result.status,
+                        "solve_seconds": seconds,
+                        "objective": result.objective if result.objective is not None else np.nan,
+                        "smd_cost": smd_cost,
+                    })
+                    print(f"✓ {result.status} in {seconds:.4f}s")
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+
+    # Save results
+    if results:
+        df = pd.DataFrame(results)
+        df.to_csv(args.output, index=False)
+        summary = df.groupby(["n", "backend"]).agg(
+            solve_seconds=("solve_seconds", "mean"),
+            objective=("objective", "mean"),
+            smd_cost=("smd_cost", "mean"),
+            optimal=("status", lambda s: (s == "optimal").mean()),
+        ).reset_index()
+        print()
+        print("=" * 60)
+        print(f"Results saved to {args.output}")
+        print()
+        print(summary.to_string(index=False))
+    else:
+        print("No results to save.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,28 @@ DEV_PACKAGES = [
     'mypy>=0.950',
 ]
 
+# Optional MILP backends (see osd/design/backends.py); scipy's HiGHS is always available
+SOLVER_PACKAGES = [
+    'highspy>=1.5.0',
+    'ortools>=9.8',
+    'pulp>=2.7.0',
+]
+
+# Optional GNN embeddings (method='gnn'); imported lazily by CandidateGenerator
+GNN_PACKAGES = [
+    'torch>=2.0',
+]
+
+# Optional approximate kNN graphs (knn_backend='nndescent')
+ANN_PACKAGES = [
+    'pynndescent>=0.5',
+]
+
+# Optional multigrid eigensolver for spectral embeddings (spectral_solver='amg')
+AMG_PACKAGES = [
+    'pyamg>=4.0',
+]
+
 setup(
     name=PROJECT_NAME,
     version=__version__,
@@ -53,6 +75,10 @@ setup(
     install_requires=REQUIRED_PACKAGES,
     extras_require={
         'dev': DEV_PACKAGES,
+        'solvers': SOLVER_PACKAGES,
+        'gnn': GNN_PACKAGES,
+        'ann': ANN_PACKAGES,
+        'amg': AMG_PACKAGES,
     },
     python_requires='>=3.8',
     # PyPI package information.
@@ -12,6 +12,7 @@ PROJECT_SRC = os.path.dirname(THIS_DIR)
 if PROJECT_SRC not in sys.path:
     sys.path.insert(0, PROJECT_SRC)
 
+from osd.utils.data_structures import GeoTable
 from osd.utils.synthetic_data import generate_synthetic_data
 from osd.design.candidate_generation import CandidateGenerator
 from osd.design.solver import SupergeoSolver
@@ -19,11 +20,17 @@ from osd.design.solver import SupergeoSolver
 def evaluate_design(units, treatment_indices):
     """
     Calculate RMSE and Bias for a given design.
+    
+    Args:
+        units: GeoTable with a true_tau truth column, or list of GeoUnit
+        treatment_indices: Positions of the treated units
     """
-    t_idx = set(treatment_indices)
-    c_idx = set(range(len(units))) - t_idx
+    table = units if isinstance(units, GeoTable) else GeoTable.from_units(units)
+    t_mask = np.zeros(len(table), dtype=bool)
+    t_mask[np.asarray(treatment_indices, dtype=np.int64)] = True
+    c_mask = ~t_mask
     
-    if len(t_idx) == 0 or len(c_idx) == 0:
+    if not t_mask.any() or not c_mask.any():
         return 999.0, 999.0 # Failure
         
     # Observed Outcomes (using potential outcomes framework)
@@ -33,15 +40,16 @@ def evaluate_design(units, treatment_indices):
     # True ATT (Average Treatment Effect on the Treated)
     # We want to compare the estimated ATT vs the true ATT for the specific group selected.
     
-    true_att = np.mean([units[i].true_tau for i in t_idx])
+    true_tau = table.truth["true_tau"]
+    true_att = np.mean(true_tau[t_mask])
     
-    y_pre = np.array([u.response for u in units])
+    y_pre = table.response
     y_post = y_pre.copy()
     
     # SIMULATE COVARIATE-DRIVEN TREND (The "Killer Feature")
     # Areas with high Income grow faster naturally.
     # If Design doesn't balance Income, DiD will be biased.
-    incomes = np.array([u.covariates['income'] for u in units])
+    incomes = table.covariate('income')
     inc_z = (incomes - incomes.mean()) / (incomes.std() + 1e-9)
     
     # Trend Effect: 10% growth differential per SD of Income
@@ -51,13 +59,12 @@ def evaluate_design(units, treatment_indices):
     y_post = y_post * (1 + trend_factor)
     
     # Add treatment effect to simulated outcome
-    for i in t_idx:
-        y_post[i] += units[i].true_tau
+    y_post[t_mask] += true_tau[t_mask]
 
-    mu_post_t = np.mean([y_post[i] for i in t_idx])
-    mu_pre_t = np.mean([y_pre[i] for i in t_idx])
-    mu_post_c = np.mean([y_post[i] for i in c_idx])
-    mu_pre_c = np.mean([y_pre[i] for i in c_idx])
+    mu_post_t = np.mean(y_post[t_mask])
+    mu_pre_t = np.mean(y_pre[t_mask])
+    mu_post_c = np.mean(y_post[c_mask])
+    mu_pre_c = np.mean(y_pre[c_mask])
     
     est_att = (mu_post_t - mu_pre_t) - (mu_post_c - mu_pre_c)
     
@@ -76,6 +83,24 @@ def calculate_smd(vals_a, vals_b):
     return (mean_a - mean_b) / pooled_std
 
 
+def summarize_solve_results(solve_results) -> Dict:
+    """Aggregate Stage 2 telemetry over the partitions solved in one replication."""
+    if not solve_results:
+        return {"n_solves": 0, "n_optimal": 0, "n_fallbacks": 0, "max_mip_gap": np.nan,
+                "build_seconds": np.nan, "solve_seconds": np.nan, "nodes": np.nan}
+    gaps = [r.mip_gap for r in solve_results if r.mip_gap is not None]
+    nodes = [r.node_count for r in solve_results if r.node_count is not None]
+    return {
+        "n_solves": len(solve_results),
+        "n_optimal": sum(r.status == "optimal" for r in solve_results),
+        "n_fallbacks": sum(r.fallback_used for r in solve_results),
+        "max_mip_gap": float(max(gaps)) if gaps else np.nan,
+        "build_seconds": float(sum(r.build_time for r in solve_results)),
+        "solve_seconds": float(sum(r.wall_time - r.build_time for r in solve_results)),
+        "nodes": int(sum(nodes)) if nodes else np.nan,
+    }
+
+
 def bootstrap_ci(data: np.ndarray, stat_func, n_resamples: int = 1000, alpha: float = 0.05, random_state: int = 0):
     """Simple percentile bootstrap confidence interval for a scalar statistic."""
     rng = np.random.default_rng(random_state)
@@ -141,10 +166,15 @@ def run_ablation(base_seed=42, use_multi_partition=False, n_partitions=5):
                     heterogeneity=0.5,
                     spatial_confounding=0.2,
                     non_linear_effect=True,
-                    seed=seed
+                    seed=seed,
+                    as_table=True
                 )
                 
                 start = time.time()
+                # Stage 2 solver telemetry (one SolveResult per solved partition)
+                solve_results = []
+                # GNN training telemetry (epochs run, seconds per epoch, final loss)
+                training_record = {}
 
                 if method == 'unit_random':
                     # True unit-level randomization baseline (no supergeos)
@@ -154,24 +184,12 @@ def run_ablation(base_seed=42, use_multi_partition=False, n_partitions=5):
                     runtimes.append(duration)
 
                     # Covariate balance at unit level
-                    t_idx = set(t_units_indices)
-                    c_idx = set(range(n)) - t_idx
-                    feature_names = sorted(list(units[0].covariates.keys()))
-                    features = ['response', 'spend'] + feature_names
+                    t_mask = np.zeros(n, dtype=bool)
+                    t_mask[t_units_indices] = True
+                    X_units = units.feature_matrix()
 
-                    abs_smd_values = []
-                    for feat in features:
-                        if feat == 'response':
-                            vals_t = [units[i].response for i in t_idx]
-                            vals_c = [units[i].response for i in c_idx]
-                        elif feat == 'spend':
-                            vals_t = [units[i].spend for i in t_idx]
-                            vals_c = [units[i].spend for i in c_idx]
-                        else:
-                            vals_t = [units[i].covariates.get(feat, 0.0) for i in t_idx]
-                            vals_c = [units[i].covariates.get(feat, 0.0) for i in c_idx]
-                        smd = abs(calculate_smd(vals_t, vals_c))
-                        abs_smd_values.append(smd)
+                    abs_smd_values = [abs(calculate_smd(X_units[t_mask, k], X_units[~t_mask, k]))
+                                      for k in range(X_units.shape[1])]
 
                     if abs_smd_values:
                         rep_max_smd = float(max(abs_smd_values))
@@ -208,16 +226,22 @@ def run_ablation(base_seed=42, use_multi_partition=False, n_partitions=5):
                             time_limit=5,
                             verbose=False
                         )
+                        solve_results = [r for r in solver.partition_results if r is not None]
                         # Use the best partition
                         supergeos = candidate_partitions[best_partition_idx]
                     else:
                         # Single-partition approach (original)
                         supergeos = generator.generate_supergeos(n_supergeos=n_super)
                         solver = SupergeoSolver(supergeos)
-                        treatment_indices = solver.solve(n_treatment=n_treat, n_control=n_control, time_limit=5)
+                        solve_result = solver.solve(n_treatment=n_treat, n_control=n_control, time_limit=5,
+                                                    return_result=True)
+                        treatment_indices = solve_result.treatment_indices
+                        solve_results = [solve_result]
 
                     duration = time.time() - start
                     runtimes.append(duration)
+                    if generator.training_info is not None:
+                        training_record = {f"gnn_{k}": v for k, v in generator.training_info.to_dict().items()}
 
                     # 3. Covariate balance evaluation via SMD at supergeo level
                     smds = solver.evaluate_balance(treatment_indices)
@@ -232,11 +256,8 @@ def run_ablation(base_seed=42, use_multi_partition=False, n_partitions=5):
                         rep_mean_smd = np.nan
 
                     # 4. Outcome evaluation (RMSE/Bias) at unit level
-                    t_units_indices = []
-                    for sg_idx in treatment_indices:
-                        sg = supergeos[sg_idx]
-                        for u_id in sg.units:
-                            t_units_indices.append(int(u_id))
+                    # Member units of the treated supergeos (positions in units)
+                    t_units_indices = supergeos.members(treatment_indices).tolist()
 
                 # Outcome evaluation (RMSE/Bias) for both cases
                 error = evaluate_design(units, t_units_indices)
@@ -249,7 +270,9 @@ def run_ablation(base_seed=42, use_multi_partition=False, n_partitions=5):
                     "rep": rep,
                     "error": float(error),
                     "max_smd": float(rep_max_smd),
-                    "mean_smd": float(rep_mean_smd)
+                    "mean_smd": float(rep_mean_smd),
+                    **summarize_solve_results(solve_results),
+                    **training_record
                 })
                 
             errors_arr = np.array(errors)
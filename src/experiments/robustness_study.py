@@ -30,7 +30,8 @@ def run_robustness():
                     effect_size=0.1, 
                     heterogeneity=0.5,
                     spatial_confounding=alpha,
-                    non_linear_effect=True # Always on for robustness check
+                    non_linear_effect=True, # Always on for robustness check
+                    as_table=True
                 )
                 
                 if method_name == 'asd':
@@ -40,10 +41,8 @@ def run_robustness():
                     # Solve
                     t_sg_indices = solver.solve(n_treatment=10, n_control=10, time_limit=5)
                     
-                    t_units_indices = []
-                    for sg_idx in t_sg_indices:
-                        for u_id in supergeos[sg_idx].units:
-                            t_units_indices.append(int(u_id))
+                    # Member units of the treated supergeos (positions in units)
+                    t_units_indices = supergeos.members(t_sg_indices).tolist()
                             
                 else: # random_design
                     # Pure random assignment of units
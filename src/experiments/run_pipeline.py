@@ -35,6 +35,9 @@ def main(seed=42, use_multi_partition=True, n_partitions=10):
             verbose=True
         )
         print(f"Selected partition {best_partition_idx} with cost {best_cost:.4f}")
+        n_fallbacks = sum(r.fallback_used for r in solver.partition_results if r is not None)
+        if n_fallbacks:
+            print(f"Warning: {n_fallbacks} of {len(candidate_partitions)} partitions used the heuristic fallback")
         
         # Get the supergeos from the best partition
         supergeos = candidate_partitions[best_partition_idx]
@@ -47,7 +50,12 @@ def main(seed=42, use_multi_partition=True, n_partitions=10):
         
         print("Stage 2: Optimal Partitioning (MILP)...")
         solver = SupergeoSolver(supergeos)
-        treatment_indices = solver.solve(n_treatment=10, n_control=10)
+        result = solver.solve(n_treatment=10, n_control=10, return_result=True)
+        treatment_indices = result.treatment_indices
+        gap = f"{result.mip_gap:.2%}" if result.mip_gap is not None else "n/a"
+        print(f"Solver: {result.status} ({result.backend}), gap={gap}, nodes={result.node_count}, "
+              f"build={result.build_time:.3f}s, total={result.wall_time:.3f}s"
+              f"{', heuristic fallback' if result.fallback_used else ''}")
     
     # Evaluate
     t_set = [supergeos[i] for i in treatment_indices]
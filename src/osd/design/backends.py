@@ -0,0 +1,349 @@
+import importlib.util
+import numpy as np
+from dataclasses import dataclass
+from scipy import sparse
+from scipy.optimize import milp, LinearConstraint, Bounds
+from typing import Dict, Optional, Type
+
+# Normalized solve statuses shared by every backend
+OPTIMAL = "optimal"
+TIME_LIMIT = "time_limit"
+INFEASIBLE = "infeasible"
+UNBOUNDED = "unbounded"
+ERROR = "error"
+
+
+@dataclass
+class MILPModel:
+    """
+    Solver-neutral mixed-integer linear program.
+
+        minimize    c' z
+        subject to  A_eq z  = b_eq
+                    A_ub z <= b_ub
+                    lb <= z <= ub
+                    z_j integer where integrality[j] == 1
+
+    SupergeoSolver builds this once per solve; every backend translates it
+    into its own API.
+    """
+    c: np.ndarray
+    A_eq: sparse.csr_matrix
+    b_eq: np.ndarray
+    A_ub: sparse.csr_matrix
+    b_ub: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    integrality: np.ndarray
+
+    @property
+    def n_vars(self) -> int:
+        return len(self.c)
+
+    def relaxed(self) -> "MILPModel":
+        """Same model with all integrality constraints dropped (LP relaxation)."""
+        return MILPModel(self.c, self.A_eq, self.b_eq, self.A_ub, self.b_ub,
+                         self.lb, self.ub, np.zeros_like(self.integrality))
+
+
+@dataclass
+class BackendResult:
+    """
+    Outcome of one backend solve, in normalized form.
+
+    mip_gap, dual_bound and node_count are branch-and-bound telemetry; they
+    are None when the backend does not report them.
+    """
+    status: str
+    x: Optional[np.ndarray]
+    objective: Optional[float]
+    message: str = ""
+    mip_gap: Optional[float] = None
+    dual_bound: Optional[float] = None
+    node_count: Optional[int] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == OPTIMAL
+
+    @property
+    def has_solution(self) -> bool:
+        return self.x is not None
+
+
+class MILPBackend:
+    """Interface for a local MILP solver."""
+    name = "base"
+
+    def solve(self, model: MILPModel, time_limit: float) -> BackendResult:
+        raise NotImplementedError
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+
+class ScipyHighsBackend(MILPBackend):
+    """HiGHS through scipy.optimize.milp (always available)."""
+    name = "scipy"
+
+    # scipy.optimize.milp status codes
+    _STATUS = {0: OPTIMAL, 1: TIME_LIMIT, 2: INFEASIBLE, 3: UNBOUNDED}
+
+    def solve(self, model: MILPModel, time_limit: float) -> BackendResult:
+        res = milp(c=model.c, constraints=[
+            LinearConstraint(model.A_eq, model.b_eq, model.b_eq),
+            LinearConstraint(model.A_ub, -np.inf, model.b_ub)
+        ], integrality=model.integrality, bounds=Bounds(model.lb, model.ub),
+            options={"time_limit": time_limit})
+        return BackendResult(
+            status=self._STATUS.get(res.status, ERROR),
+            x=res.x,
+            objective=res.fun,
+            message=str(res.message),
+            mip_gap=_finite(getattr(res, "mip_gap", None)),
+            dual_bound=_finite(getattr(res, "mip_dual_bound", None)),
+            node_count=getattr(res, "mip_node_count", None),
+        )
+
+
+class HighspyBackend(MILPBackend):
+    """HiGHS through its own Python bindings (highspy), skipping scipy's wrapper."""
+    name = "highspy"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return _importable("highspy")
+
+    def solve(self, model: MILPModel, time_limit: float) -> BackendResult:
+        import highspy
+
+        A = sparse.vstack([model.A_eq, model.A_ub], format="csc")
+        lp = highspy.HighsLp()
+        lp.num_col_ = model.n_vars
+        lp.num_row_ = A.shape[0]
+        lp.col_cost_ = model.c
+        lp.col_lower_ = model.lb
+        lp.col_upper_ = model.ub
+        lp.row_lower_ = np.concatenate([model.b_eq, np.full(len(model.b_ub), -highspy.kHighsInf)])
+        lp.row_upper_ = np.concatenate([model.b_eq, model.b_ub])
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        lp.integrality_ = [highspy.HighsVarType.kInteger if v else highspy.HighsVarType.kContinuous
+                           for v in model.integrality]
+
+        h = highspy.Highs()
+        h.setOptionValue("output_flag", False)
+        h.setOptionValue("time_limit", float(time_limit))
+        h.passModel(lp)
+        h.run()
+
+        model_status = h.getModelStatus()
+        status = {
+            highspy.HighsModelStatus.kOptimal: OPTIMAL,
+            highspy.HighsModelStatus.kTimeLimit: TIME_LIMIT,
+            highspy.HighsModelStatus.kInfeasible: INFEASIBLE,
+            highspy.HighsModelStatus.kUnbounded: UNBOUNDED,
+        }.get(model_status, ERROR)
+        info = h.getInfo()
+        has_solution = info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+        return BackendResult(
+            status=status,
+            x=np.asarray(h.getSolution().col_value) if has_solution else None,
+            objective=info.objective_function_value if has_solution else None,
+            message=h.modelStatusToString(model_status),
+            mip_gap=_finite(info.mip_gap),
+            dual_bound=_finite(info.mip_dual_bound),
+            node_count=int(info.mip_node_count),
+        )
+
+
+class CPSATBackend(MILPBackend):
+    """
+    OR-Tools CP-SAT.
+
+    CP-SAT only handles integer coefficients and variables, so the model is
+    put on a fixed-point grid: each continuous variable z is replaced by an
+    integer z' = scale * z, and every constraint row is multiplied by
+    scale^2 and rounded. Coefficients therefore keep about log10(scale)
+    significant decimals on both integer and continuous variables, and the
+    solution is optimal for the rounded model.
+    """
+    name = "cpsat"
+
+    def __init__(self, scale: float = 1e4, num_workers: int = 0):
+        self.scale = scale
+        self.num_workers = num_workers
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return _importable("ortools")
+
+    def solve(self, model: MILPModel, time_limit: float) -> BackendResult:
+        from ortools.sat.python import cp_model
+
+        is_int = model.integrality.astype(bool)
+        # Integer variables keep their values; continuous ones live on the scale grid
+        var_scale = np.where(is_int, 1.0, self.scale)
+        A = sparse.vstack([model.A_eq, model.A_ub], format="csr")
+        row_scale = self.scale ** 2
+        coef = A.multiply(row_scale / var_scale[None, :]).tocsr()
+        coef.data = np.round(coef.data)
+        rhs = np.round(np.concatenate([model.b_eq, model.b_ub]) * row_scale)
+        n_eq = len(model.b_eq)
+
+        # Finite domains: no variable can usefully exceed the largest |row activity| it offsets
+        row_span = np.abs(coef).sum(axis=1).A1 + np.abs(rhs)
+        default_ub = int(row_span.max() / self.scale) + 1 if len(row_span) else 1
+
+        cp = cp_model.CpModel()
+        variables = []
+        for j in range(model.n_vars):
+            lo = model.lb[j] * var_scale[j]
+            hi = model.ub[j] * var_scale[j]
+            lo = -default_ub if not np.isfinite(lo) else int(np.floor(lo))
+            hi = default_ub if not np.isfinite(hi) else int(np.ceil(hi))
+            variables.append(cp.NewIntVar(lo, hi, f"z{j}"))
+
+        for r in range(A.shape[0]):
+            start, stop = coef.indptr[r], coef.indptr[r + 1]
+            expr = cp_model.LinearExpr.WeightedSum(
+                [variables[j] for j in coef.indices[start:stop]],
+                coef.data[start:stop].astype(np.int64).tolist()
+            )
+            if r < n_eq:
+                cp.Add(expr == int(rhs[r]))
+            else:
+                cp.Add(expr <= int(rhs[r]))
+
+        # Objective on a finer grid: c_j * z_j = (c_j / var_scale_j) * z'_j,
+        # times a common factor so fractional weights survive the rounding
+        obj_scale = self.scale * 1e3
+        obj_coef = np.round(model.c * obj_scale / var_scale).astype(np.int64)
+        nonzero = np.flatnonzero(obj_coef)
+        cp.Minimize(cp_model.LinearExpr.WeightedSum([variables[j] for j in nonzero],
+                                                    obj_coef[nonzero].tolist()))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = float(time_limit)
+        if self.num_workers:
+            solver.parameters.num_workers = self.num_workers
+        code = solver.Solve(cp)
+
+        status = {
+            cp_model.OPTIMAL: OPTIMAL,
+            cp_model.FEASIBLE: TIME_LIMIT,
+            cp_model.INFEASIBLE: INFEASIBLE,
+        }.get(code, ERROR)
+        if code not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return BackendResult(status=status, x=None, objective=None, message=solver.StatusName(code),
+                                 node_count=int(solver.NumBranches()))
+
+        x = np.array([solver.Value(v) for v in variables], dtype=float) / var_scale
+        objective = float(model.c @ x)
+        dual_bound = solver.BestObjectiveBound() / obj_scale
+        return BackendResult(status=status, x=x, objective=objective,
+                             message=solver.StatusName(code),
+                             mip_gap=_relative_gap(objective, dual_bound),
+                             dual_bound=dual_bound,
+                             node_count=int(solver.NumBranches()))
+
+
+class PulpCBCBackend(MILPBackend):
+    """COIN-OR CBC through PuLP."""
+    name = "cbc"
+
+    # PuLP sol_status codes
+    _STATUS = {1: OPTIMAL, 2: TIME_LIMIT, -1: INFEASIBLE, -2: UNBOUNDED}
+    _MESSAGES = {2: "Solution found, time limit reached"}
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return _importable("pulp")
+
+    def solve(self, model: MILPModel, time_limit: float) -> BackendResult:
+        import pulp
+
+        prob = pulp.LpProblem("supergeo_assignment", pulp.LpMinimize)
+        variables = [
+            pulp.LpVariable(
+                f"z{j}",
+                lowBound=model.lb[j] if np.isfinite(model.lb[j]) else None,
+                upBound=model.ub[j] if np.isfinite(model.ub[j]) else None,
+                cat=pulp.LpInteger if model.integrality[j] else pulp.LpContinuous,
+            )
+            for j in range(model.n_vars)
+        ]
+        prob += pulp.LpAffineExpression(
+            [(variables[j], float(v)) for j, v in enumerate(model.c) if v != 0]
+        )
+
+        for A, b, sense in ((model.A_eq, model.b_eq, pulp.LpConstraintEQ),
+                            (model.A_ub, model.b_ub, pulp.LpConstraintLE)):
+            for r in range(A.shape[0]):
+                start, stop = A.indptr[r], A.indptr[r + 1]
+                expr = pulp.LpAffineExpression(
+                    [(variables[j], float(v)) for j, v in zip(A.indices[start:stop], A.data[start:stop])]
+                )
+                prob += pulp.LpConstraint(expr, sense=sense, rhs=float(b[r]))
+
+        prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+
+        # sol_status: 1 optimal, 2 feasible (limit reached), -1 infeasible, -2 unbounded.
+        # prob.status (and LpStatus) reads "Optimal" in the limit case too, so
+        # the message is built from sol_status as well.
+        status = self._STATUS.get(prob.sol_status, ERROR)
+        message = self._MESSAGES.get(prob.sol_status, pulp.LpSolution.get(prob.sol_status, "Not Solved"))
+        if prob.sol_status not in (1, 2):
+            return BackendResult(status=status, x=None, objective=None, message=message)
+
+        x = np.array([v.varValue or 0.0 for v in variables])
+        return BackendResult(status=status, x=x, objective=float(model.c @ x), message=message)
+
+
+BACKENDS: Dict[str, Type[MILPBackend]] = {
+    backend.name: backend
+    for backend in (ScipyHighsBackend, HighspyBackend, CPSATBackend, PulpCBCBackend)
+}
+
+
+def get_backend(backend) -> MILPBackend:
+    """
+    Resolve a backend name ('scipy', 'highspy', 'cpsat', 'cbc') or instance.
+
+    Raises:
+        ValueError: Unknown backend name
+        ImportError: The backend's solver package is not installed
+    """
+    if isinstance(backend, MILPBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MILP backend: {backend}. Choose from {sorted(BACKENDS)}")
+    cls = BACKENDS[backend]
+    if not cls.is_available():
+        raise ImportError(f"MILP backend '{backend}' is not installed (pip install osd[solvers])")
+    return cls()
+
+
+def available_backends():
+    """Names of the backends whose solver packages can be imported."""
+    return [name for name, cls in BACKENDS.items() if cls.is_available()]
+
+
+def _finite(value) -> Optional[float]:
+    """Float value, or None for missing/non-finite telemetry."""
+    if value is None or not np.isfinite(value):
+        return None
+    return float(value)
+
+
+def _relative_gap(objective: float, bound: float) -> float:
+    """MIP gap |objective - bound| / |objective|, as HiGHS reports it."""
+    return abs(objective - bound) / max(abs(objective), 1e-10)
+
+
+def _importable(module: str) -> bool:
+    """Check that a package is installed without importing it."""
+    return importlib.util.find_spec(module) is not None
@@ -0,0 +1,202 @@
+import numpy as np
+from typing import Iterable, Optional
+
+
+def smd_from_moments(n_t, sum_t, sumsq_t, n_c, sum_c, sumsq_c):
+    """
+    Standardized Mean Difference from group counts, sums and sums of squares.
+
+    Implements the same formula as SupergeoSolver.calculate_smd (Section 4.3),
+    SMD = (mean_T - mean_C) / sqrt((var_T + var_C) / 2) with Bessel-corrected
+    variances, but from sufficient statistics so it broadcasts over features
+    and over many assignments at once.
+
+    Args:
+        n_t, n_c: Group sizes, shape [...] or [..., 1]
+        sum_t, sum_c: Per-feature sums, shape [..., n_features]
+        sumsq_t, sumsq_c: Per-feature sums of squares, shape [..., n_features]
+
+    Returns:
+        SMD array of shape [..., n_features] (0 where the pooled std is ~0)
+    """
+    n_t = np.asarray(n_t, dtype=float)
+    n_c = np.asarray(n_c, dtype=float)
+    if n_t.ndim == np.ndim(sum_t) - 1:
+        n_t, n_c = n_t[..., None], n_c[..., None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_t = sum_t / n_t
+        mean_c = sum_c / n_c
+        # Var = (Sum(x^2) - Sum(x)^2 / n) / (n - 1); zero for singleton groups
+        var_t = np.where(n_t > 1, (sumsq_t - sum_t * mean_t) / (n_t - 1), 0.0)
+        var_c = np.where(n_c > 1, (sumsq_c - sum_c * mean_c) / (n_c - 1), 0.0)
+        pooled_std = np.sqrt(np.maximum((var_t + var_c) / 2, 0.0))
+        smd = np.where(pooled_std < 1e-9, 0.0, (mean_t - mean_c) / pooled_std)
+    return smd
+
+
+def batch_smd(assignments: np.ndarray, X: np.ndarray, weights: Optional[np.ndarray] = None,
+              chunk_size: Optional[int] = None):
+    """
+    SMDs and weighted costs for many assignments with matrix products.
+
+    Group sums and sums of squares for a chunk of assignments come from a
+    single product M @ [Xc, Xc^2], where M is the boolean assignment matrix and
+    Xc the mean-centered features; control statistics are the totals minus
+    treatment. No Python loop runs over assignments or features.
+
+    Args:
+        assignments: Boolean matrix [n_assignments, n], True = treatment
+        X: Feature matrix [n, n_features] on the original scale
+        weights: Per-feature weights for the cost (default: all 1.0)
+        chunk_size: Assignments per matrix product. Defaults to a size that
+                    keeps each chunk of M around 16M elements.
+
+    Returns:
+        Tuple of (smd [n_assignments, n_features], cost [n_assignments]).
+        Assignments with an empty group get inf SMDs and inf cost.
+    """
+    assignments = np.atleast_2d(np.asarray(assignments, dtype=bool))
+    X = np.asarray(X, dtype=float)
+    n_assignments, n = assignments.shape
+    n_features = X.shape[1]
+    if X.shape[0] != n:
+        raise ValueError(f"assignments have {n} columns but X has {X.shape[0]} rows")
+    weights = np.ones(n_features) if weights is None else np.asarray(weights, dtype=float)
+    if chunk_size is None:
+        chunk_size = max(1, 2 ** 24 // max(n, 1))
+
+    Xc = X - X.mean(axis=0)
+    moments = np.hstack([Xc, Xc ** 2])
+    totals = moments.sum(axis=0)
+
+    smd = np.empty((n_assignments, n_features))
+    for start in range(0, n_assignments, chunk_size):
+        M = assignments[start:start + chunk_size].astype(float)
+        n_t = M.sum(axis=1)
+        treated = M @ moments
+        control = totals - treated
+        smd[start:start + chunk_size] = smd_from_moments(
+            n_t, treated[:, :n_features], treated[:, n_features:],
+            n - n_t, control[:, :n_features], control[:, n_features:]
+        )
+
+    n_t = assignments.sum(axis=1)
+    smd[(n_t == 0) | (n_t == n)] = np.inf
+    return smd, np.abs(smd) @ weights
+
+
+class BalanceTracker:
+    """
+    Incremental covariate balance for a single T/C assignment.
+
+    Keeps per-group counts, sums and sums of squares of the features, so
+    SMDs and the weighted cost are available in O(n_features) after each
+    add, remove or swap instead of re-indexing the full feature matrix.
+    Features are centered on their overall mean first, which keeps the
+    sums-of-squares variance numerically close to the two-pass estimate.
+
+    Units can be in treatment, in control or unassigned, so partial
+    assignments (e.g. during greedy construction) are supported.
+    """
+    UNASSIGNED = -1
+    CONTROL = 0
+    TREATMENT = 1
+
+    def __init__(self, X: np.ndarray, weights: Optional[np.ndarray] = None,
+                 treatment_indices: Iterable[int] = (), control_indices: Optional[Iterable[int]] = None):
+        """
+        Args:
+            X: Feature matrix [n, n_features] on the original scale
+            weights: Per-feature weights for cost() (default: all 1.0)
+            treatment_indices: Units initially in treatment
+            control_indices: Units initially in control. If None, every unit
+                             not in treatment starts in control.
+        """
+        X = np.asarray(X, dtype=float)
+        self.n, self.n_features = X.shape
+        self.weights = np.ones(self.n_features) if weights is None else np.asarray(weights, dtype=float)
+
+        self._Xc = X - X.mean(axis=0) if self.n else X
+        self._Xc_sq = self._Xc ** 2
+
+        self.group = np.full(self.n, self.UNASSIGNED, dtype=np.int8)
+        self.counts = np.zeros(2, dtype=np.int64)
+        self.sums = np.zeros((2, self.n_features))
+        self.sumsq = np.zeros((2, self.n_features))
+
+        t_idx = np.unique(np.asarray(list(treatment_indices), dtype=np.int64))
+        if control_indices is None:
+            c_idx = np.setdiff1d(np.arange(self.n), t_idx)
+        else:
+            c_idx = np.unique(np.asarray(list(control_indices), dtype=np.int64))
+
+        for g, idx in ((self.TREATMENT, t_idx), (self.CONTROL, c_idx)):
+            self.group[idx] = g
+            self.counts[g] = len(idx)
+            self.sums[g] = self._Xc[idx].sum(axis=0)
+            self.sumsq[g] = self._Xc_sq[idx].sum(axis=0)
+
+    def add(self, i: int, treatment: bool = True):
+        """Assign an unassigned unit to treatment (or control)."""
+        if self.group[i] != self.UNASSIGNED:
+            raise ValueError(f"Unit {i} is already assigned")
+        g = self.TREATMENT if treatment else self.CONTROL
+        self.group[i] = g
+        self.counts[g] += 1
+        self.sums[g] += self._Xc[i]
+        self.sumsq[g] += self._Xc_sq[i]
+
+    def remove(self, i: int):
+        """Take a unit out of its group."""
+        g = self.group[i]
+        if g == self.UNASSIGNED:
+            raise ValueError(f"Unit {i} is not assigned")
+        self.group[i] = self.UNASSIGNED
+        self.counts[g] -= 1
+        self.sums[g] -= self._Xc[i]
+        self.sumsq[g] -= self._Xc_sq[i]
+
+    def move(self, i: int):
+        """Move an assigned unit to the other group."""
+        g = self.group[i]
+        self.remove(i)
+        self.add(i, treatment=(g == self.CONTROL))
+
+    def swap(self, i: int, j: int):
+        """Exchange a treatment unit i with a control unit j."""
+        if self.group[i] != self.TREATMENT or self.group[j] != self.CONTROL:
+            raise ValueError(f"swap expects unit {i} in treatment and unit {j} in control")
+        self.move(i)
+        self.move(j)
+
+    def smd(self) -> np.ndarray:
+        """Current SMD per feature (inf if either group is empty)."""
+        if self.counts[self.TREATMENT] == 0 or self.counts[self.CONTROL] == 0:
+            return np.full(self.n_features, np.inf)
+        t, c = self.TREATMENT, self.CONTROL
+        return smd_from_moments(self.counts[t], self.sums[t], self.sumsq[t],
+                                self.counts[c], self.sums[c], self.sumsq[c])
+
+    def cost(self) -> float:
+        """Weighted sum of absolute SMDs, as in SupergeoSolver._evaluate_cost."""
+        return float(np.abs(self.smd()) @ self.weights)
+
+    def swap_cost(self, i: int, j: int) -> float:
+        """Cost after swapping treatment unit i with control unit j, without applying it."""
+        t, c = self.TREATMENT, self.CONTROL
+        if self.counts[t] == 0 or self.counts[c] == 0:
+            return np.inf
+        dx = self._Xc[j] - self._Xc[i]
+        dx_sq = self._Xc_sq[j] - self._Xc_sq[i]
+        smd = smd_from_moments(self.counts[t], self.sums[t] + dx, self.sumsq[t] + dx_sq,
+                               self.counts[c], self.sums[c] - dx, self.sumsq[c] - dx_sq)
+        return float(np.abs(smd) @ self.weights)
+
+    @property
+    def treatment_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.group == self.TREATMENT)
+
+    @property
+    def control_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.group == self.CONTROL)
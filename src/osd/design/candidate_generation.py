@@ -1,53 +1,219 @@
+import time
 import numpy as np
-import torch
-import torch.optim as optim
-from sklearn.neighbors import kneighbors_graph
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from sklearn.cluster import AgglomerativeClustering
 from sklearn.decomposition import PCA
 from sklearn.manifold import SpectralEmbedding
-from typing import List, Dict, Tuple
+from scipy.cluster.hierarchy import fcluster, linkage as linkage_tree
+from typing import List, Dict, Optional, Tuple, Union
 
-from osd.utils.data_structures import GeoUnit
-from osd.models.gnn import GraphSAGE, ContrastiveLoss
-from osd.design.solver import Supergeo
+from osd.design.clustering import micro_cluster, weighted_linkage
+from osd.design.embedding import knn_graph, pca_embeddings, streaming_moments
+from osd.utils.data_structures import GeoTable, GeoUnit, SupergeoSet
+from osd.utils.parallel import resolve_n_jobs, run_tasks
+
+# Features whose supergeo value is the sum over member units; all others
+# are intensive and aggregate as population-weighted means
+EXTENSIVE_KEYWORDS = ("population", "spend", "response", "users", "count")
+
+def extensive_mask(feature_names: List[str]) -> np.ndarray:
+    """Aggregation schema: True where a feature is extensive (summed), False where intensive."""
+    return np.array([any(kw in f.lower() for kw in EXTENSIVE_KEYWORDS) for f in feature_names], dtype=bool)
+
+@dataclass
+class TrainingInfo:
+    """
+    GNN training telemetry from CandidateGenerator.train_embeddings().
+    
+    stop_reason is 'max_epochs', 'plateau' (no relative loss improvement
+    above tol for patience epochs) or 'time_budget'. losses holds the
+    per-epoch training loss (mean over mini-batches when batched).
+    """
+    num_threads: int
+    losses: List[float] = field(default_factory=list)
+    epoch_times: List[float] = field(default_factory=list)
+    stop_reason: str = "max_epochs"
+    
+    @property
+    def epochs_run(self) -> int:
+        return len(self.losses)
+    
+    @property
+    def final_loss(self) -> Optional[float]:
+        return self.losses[-1] if self.losses else None
+    
+    @property
+    def seconds_per_epoch(self) -> Optional[float]:
+        return float(np.mean(self.epoch_times)) if self.epoch_times else None
+    
+    def to_dict(self) -> Dict:
+        """Summary as a flat dict (without the per-epoch lists), e.g. for a results CSV row."""
+        return {"epochs_run": self.epochs_run, "seconds_per_epoch": self.seconds_per_epoch,
+                "final_loss": self.final_loss, "stop_reason": self.stop_reason,
+                "num_threads": self.num_threads}
 
 class CandidateGenerator:
-    def __init__(self, geo_units: List[GeoUnit], embedding_dim=32, method="pca"):
+    def __init__(self, geo_units: Union[GeoTable, List[GeoUnit]], embedding_dim=32, method="pca",
+                 micro_clusters: Optional[int] = None, connectivity: Optional[str] = None,
+                 n_neighbors: int = 10, features=None, pca_solver: str = "auto",
+                 chunk_size: int = 10000, spectral_solver: str = "arpack",
+                 spectral_components: Optional[int] = None, knn_backend: str = "exact",
+                 gnn_batch_size: Optional[int] = None, gnn_fanouts: Tuple[int, ...] = (10, 10),
+                 num_threads: Optional[int] = None):
         """
         Args:
-            geo_units: List of GeoUnit objects
+            geo_units: GeoTable, or list of GeoUnit objects (converted once)
             embedding_dim: Dimension of embeddings (for GNN/PCA)
             method: 'pca', 'gnn', 'spectral', 'random' (Default: pca)
+            micro_clusters: Large-N mode. When set and smaller than the number
+                of units, units are first over-clustered with MiniBatchKMeans
+                into this many micro-clusters, and hierarchical clustering runs
+                on their size-weighted centroids (a few thousand is typical).
+                None (default) clusters units directly, which needs O(N^2) memory.
+            connectivity: Restrict merges to a sparse k-nearest-neighbour graph
+                built from 'embeddings' or from geographic 'coords' (the
+                table's coordinate columns, compared with Euclidean distance).
+                Structured clustering is much cheaper at large N and 'coords'
+                yields spatially contiguous supergeos. None (default) is
+                unstructured.
+            n_neighbors: Neighbours per unit in the connectivity graph
+            features: Optional array-like [n_units, n_features] to embed
+                instead of the table's feature matrix, e.g. an np.memmap of
+                long pre-period time series. Supergeo aggregation still uses
+                the table columns.
+            pca_solver: 'auto' (default, exact sklearn PCA on the in-memory
+                normalized matrix), 'randomized' (randomized SVD for wide
+                feature sets) or 'incremental' (IncrementalPCA over row chunks
+                with streaming normalization, never materializing the matrix)
+            chunk_size: Rows per chunk for the streaming passes
+            spectral_solver: Eigensolver for spectral embeddings: 'arpack'
+                (default, shift-invert), 'lobpcg', or 'amg' (needs pyamg;
+                falls back to 'lobpcg' when it is not installed)
+            spectral_components: Cap on the number of eigenvectors computed
+                for spectral embeddings (default: embedding_dim)
+            knn_backend: 'exact' (default) or 'nndescent' (approximate, via
+                pynndescent) for the kNN graphs behind GNN and spectral
+                embeddings and connectivity. Graphs are cached by data
+                fingerprint and shared across methods and generators.
+            gnn_batch_size: Anchor nodes per GNN training step. None (default)
+                trains full-batch; an integer switches to neighbour-sampled
+                mini-batches with chunked layer-wise inference, so memory
+                stays flat as N grows. Each epoch is one pass over all nodes.
+            gnn_fanouts: Neighbours sampled per node in each GNN layer
+                (mini-batch training only)
+            num_threads: torch intra-op threads for GNN training (restored
+                afterwards). Set to 1 when generators run inside parallel
+                workers to avoid oversubscription. None keeps torch's default.
         """
+        if pca_solver not in ("auto", "randomized", "incremental"):
+            raise ValueError(f"Unknown PCA solver: {pca_solver}")
+        if spectral_solver not in ("arpack", "lobpcg", "amg"):
+            raise ValueError(f"Unknown spectral solver: {spectral_solver}")
+        if connectivity not in (None, "embeddings", "coords"):
+            raise ValueError(f"Unknown connectivity: {connectivity}")
+        if connectivity is not None and micro_clusters is not None:
+            raise ValueError("connectivity and micro_clusters cannot be combined")
         self.geo_units = geo_units
+        self.table = geo_units if isinstance(geo_units, GeoTable) else GeoTable.from_units(geo_units)
         self.embedding_dim = embedding_dim
         self.method = method
+        self.micro_clusters = micro_clusters
+        self._micro = None
+        self.connectivity = connectivity
+        self.n_neighbors = n_neighbors
+        self._graph = None
+        if connectivity == "coords" and self.table.coords is None:
+            raise ValueError("connectivity='coords' needs a GeoTable with coords")
         
-        # Extract features
-        self.feature_names = sorted(list(geo_units[0].covariates.keys()))
-        self.X_raw = np.stack([g.to_feature_vector(self.feature_names) for g in geo_units])
+        # Extract features (columns as GeoUnit.to_feature_vector orders them)
+        self.feature_names = list(self.table.covariate_names)
+        # Full-precision unit values and IDs for supergeo aggregation
+        self.unit_values = self.table.feature_matrix()
+        self.unit_ids = self.table.ids
+        self.X_raw = self.unit_values.astype(np.float32)
+        # Aggregation schema over [response, spend, *covariates], computed once
+        self.extensive = extensive_mask(self.table.feature_names)
+        # Intensive features are weighted by population if available, else equally
+        if "population" in self.feature_names:
+            self.intensive_weights = self.table.covariate("population")
+        else:
+            self.intensive_weights = np.ones(len(self.table))
+        
+        # Embedding inputs; normalized lazily (see X_norm)
+        if features is not None and features.shape[0] != len(self.table):
+            raise ValueError(f"features has {features.shape[0]} rows for {len(self.table)} units")
+        self.features = self.X_raw if features is None else features
+        self.pca_solver = pca_solver
+        self.chunk_size = chunk_size
+        self.spectral_solver = spectral_solver
+        self.spectral_components = spectral_components
+        self.knn_backend = knn_backend
+        self.gnn_batch_size = gnn_batch_size
+        self.gnn_fanouts = tuple(gnn_fanouts)
+        self.num_threads = num_threads
+        self.training_info = None
+        self._X_norm = None
+    
+    @property
+    def X_norm(self) -> np.ndarray:
+        """Standardized embedding inputs (float32), materialized on first use."""
+        if self._X_norm is None:
+            if self.features is self.X_raw:
+                self._X_norm = (self.X_raw - self.X_raw.mean(0)) / (self.X_raw.std(0) + 1e-6)
+            else:
+                mean, std = streaming_moments(self.features, self.chunk_size)
+                self._X_norm = ((np.asarray(self.features, dtype=np.float64) - mean) / (std + 1e-6)).astype(np.float32)
+        return self._X_norm
         
-        # Normalize
-        self.X_norm = (self.X_raw - self.X_raw.mean(0)) / (self.X_raw.std(0) + 1e-6)
+    def train_embeddings(self, epochs=100, lr=0.01, patience: Optional[int] = None, tol: float = 1e-4,
+                         time_budget: Optional[float] = None):
+        """
+        Compute unit embeddings with the configured method.
         
-    def train_embeddings(self, epochs=100, lr=0.01):
+        Args:
+            epochs: Maximum GNN training epochs
+            lr: GNN learning rate
+            patience: Stop GNN training once the loss has not improved on its
+                best by more than tol (relative) for this many epochs. None
+                (default) always runs all epochs.
+            tol: Relative improvement that counts as progress
+            time_budget: Wall-clock seconds for GNN training; stops before an
+                epoch that would likely overrun it
+                
+        Returns:
+            Embeddings [n_units, dim]; GNN telemetry goes to self.training_info
+        """
+        self._micro = None
+        self._graph = None
+        self.training_info = None
         if self.method == "gnn":
-            return self._train_gnn(epochs, lr)
+            _import_torch()
+            with _torch_threads(self.num_threads):
+                return self._train_gnn(epochs, lr, patience, tol, time_budget)
         elif self.method == "pca":
             return self._train_pca()
         elif self.method == "spectral":
             return self._train_spectral()
         elif self.method == "random":
-            self.embeddings = np.random.randn(len(self.geo_units), self.embedding_dim)
+            self.embeddings = np.random.randn(len(self.table), self.embedding_dim)
             return self.embeddings
         else:
             raise ValueError(f"Unknown method: {self.method}")
 
-    def _train_gnn(self, epochs, lr):
+    def _train_gnn(self, epochs, lr, patience=None, tol=1e-4, time_budget=None):
         # Build Graph (k-NN)
-        k = min(10, len(self.geo_units) - 1)
-        adj_sparse = kneighbors_graph(self.X_norm, k, mode='connectivity', include_self=True)
-        adj_dense = torch.tensor(adj_sparse.toarray(), dtype=torch.float32)
+        adj_sparse = knn_graph(self.X_norm, 10, include_self=True, backend=self.knn_backend)
+        if self.gnn_batch_size is not None:
+            return self._train_gnn_minibatch(adj_sparse.tocsr(), epochs, lr, patience, tol, time_budget)
+        torch = _import_torch()
+        import torch.optim as optim
+        from osd.models.gnn import GraphSAGE, ContrastiveLoss, node_degree, sparse_adjacency
+        
+        # Sparse aggregation end to end; degrees computed once for all epochs
+        adj = sparse_adjacency(adj_sparse)
+        degree = node_degree(adj)
         
         features = torch.tensor(self.X_norm, dtype=torch.float32)
         
@@ -56,36 +222,109 @@ class CandidateGenerator:
         optimizer = optim.Adam(model.parameters(), lr=lr)
         criterion = ContrastiveLoss()
         
-        model.train()
-        for epoch in range(epochs):
+        def run_epoch():
             optimizer.zero_grad()
-            emb = model(features, adj_dense)
-            loss = criterion(emb, adj_dense)
+            emb = model(features, adj, degree)
+            loss = criterion(emb, adj)
             loss.backward()
             optimizer.step()
+            return loss.item()
+        
+        model.train()
+        self.training_info = _fit_epochs(run_epoch, epochs, patience, tol, time_budget)
             
         model.eval()
         with torch.no_grad():
-            self.embeddings = model(features, adj_dense).numpy()
+            self.embeddings = model(features, adj, degree).numpy()
             
         return self.embeddings
 
+    def _train_gnn_minibatch(self, adj, epochs, lr, patience=None, tol=1e-4, time_budget=None,
+                             neg_samples=5):
+        """
+        Neighbour-sampled mini-batch GraphSAGE training.
+        
+        Each step takes a batch of anchor nodes, one random neighbour of each
+        as its positive and neg_samples uniform negatives, embeds those nodes
+        through sampled blocks (sample_blocks()) and applies
+        ContrastiveLoss.batch_loss(). Sampling follows torch's seed.
+        """
+        torch = _import_torch()
+        import torch.optim as optim
+        from osd.models.gnn import GraphSAGE, ContrastiveLoss, sample_blocks
+        
+        n = adj.shape[0]
+        features = torch.tensor(self.X_norm, dtype=torch.float32)
+        rng = np.random.default_rng(torch.initial_seed())
+        # Sorted edge keys for rejecting negatives that are neighbours
+        coo = adj.tocoo()
+        edge_keys = torch.from_numpy(np.sort(coo.row.astype(np.int64) * n + coo.col))
+        counts = np.diff(adj.indptr)
+        
+        model = GraphSAGE(features.shape[1], 64, self.embedding_dim)
+        if len(self.gnn_fanouts) != len(model.layers):
+            raise ValueError(f"gnn_fanouts needs one entry per layer ({len(model.layers)})")
+        optimizer = optim.Adam(model.parameters(), lr=lr)
+        criterion = ContrastiveLoss()
+        
+        def run_epoch():
+            losses = []
+            for batch in np.array_split(rng.permutation(n), max(1, -(-n // self.gnn_batch_size))):
+                positives = adj.indices[adj.indptr[batch] + (rng.random(len(batch)) * counts[batch]).astype(np.int64)]
+                negatives = rng.integers(0, n, (neg_samples, len(batch)))
+                nodes, local = np.unique(np.concatenate([batch, positives, negatives.ravel()]), return_inverse=True)
+                input_nodes, blocks = sample_blocks(adj.indptr, adj.indices, nodes, self.gnn_fanouts, rng)
+                
+                optimizer.zero_grad()
+                emb = model.forward_blocks(features[torch.from_numpy(input_nodes)], blocks)
+                local = torch.from_numpy(local)
+                valid = criterion.valid_negatives(edge_keys, torch.from_numpy(batch), torch.from_numpy(negatives), n)
+                loss = criterion.batch_loss(emb, local[:len(batch)], local[len(batch):2 * len(batch)],
+                                            local[2 * len(batch):].view(neg_samples, -1), valid)
+                loss.backward()
+                optimizer.step()
+                losses.append(loss.item())
+            return float(np.mean(losses))
+        
+        model.train()
+        self.training_info = _fit_epochs(run_epoch, epochs, patience, tol, time_budget)
+        
+        model.eval()
+        self.embeddings = model.inference(features, adj, chunk_size=self.chunk_size).numpy()
+        return self.embeddings
+    
     def _train_pca(self):
-        n_components = min(self.embedding_dim, self.X_norm.shape[1])
+        n_components = min(self.embedding_dim, self.features.shape[1])
+        if self.pca_solver != "auto":
+            self.embeddings = pca_embeddings(self.features, n_components, solver=self.pca_solver,
+                                             chunk_size=self.chunk_size)
+            return self.embeddings
         pca = PCA(n_components=n_components)
         self.embeddings = pca.fit_transform(self.X_norm)
         return self.embeddings
 
     def _train_spectral(self):
-        k = min(10, len(self.geo_units) - 1)
-        adj = kneighbors_graph(self.X_norm, k, mode='connectivity', include_self=True)
-        embedding = SpectralEmbedding(n_components=self.embedding_dim, affinity='precomputed')
-        # Note: SpectralEmbedding expects affinity matrix. kneighbors_graph returns adjacency (0/1).
-        # We treat adjacency as affinity.
-        self.embeddings = embedding.fit_transform(adj)
+        adj = knn_graph(self.X_norm, 10, include_self=True, backend=self.knn_backend)
+        # SpectralEmbedding expects a symmetric affinity; average the directed
+        # kNN adjacency with its transpose once here instead of inside sklearn
+        affinity = (0.5 * (adj + adj.T)).tocsr()
+        
+        eigen_solver = self.spectral_solver
+        if eigen_solver == "amg":
+            try:
+                import pyamg  # noqa: F401
+            except ImportError:
+                print("Warning: pyamg not installed, using lobpcg for spectral embedding")
+                eigen_solver = "lobpcg"
+        n_components = self.embedding_dim
+        if self.spectral_components is not None:
+            n_components = min(n_components, self.spectral_components)
+        embedding = SpectralEmbedding(n_components=n_components, affinity='precomputed',
+                                      eigen_solver=eigen_solver)
+        self.embeddings = embedding.fit_transform(affinity)
         return self.embeddings
 
-    def generate_supergeos(self, n_supergeos: int) -> List[Supergeo]:
+    def generate_supergeos(self, n_supergeos: int) -> SupergeoSet:
         """
         Cluster embeddings to form supergeos (single partition).
         
@@ -94,130 +333,293 @@ class CandidateGenerator:
         if not hasattr(self, 'embeddings'):
             self.train_embeddings()
             
-        # Hierarchical Clustering
-        clustering = AgglomerativeClustering(
-            n_clusters=n_supergeos,
-            metric='euclidean',
-            linkage='ward'
-        )
-        labels = clustering.fit_predict(self.embeddings)
+        # Hierarchical Clustering (on micro-cluster centroids in large-N mode)
+        points, weights, unit_map = self._clustering_points()
+        labels = _fit_labels(points, 'ward', min(n_supergeos, len(points)), weights=weights,
+                             connectivity=self._connectivity_graph())
         
-        return self._labels_to_supergeos(labels)
+        return self._labels_to_supergeos(labels if unit_map is None else labels[unit_map])
     
-    def generate_candidate_partitions(self, n_partitions: int, n_supergeos: int, seed=None) -> List[List[Supergeo]]:
+    def _clustering_points(self) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Points handed to hierarchical clustering.
+        
+        Returns:
+            Tuple of (points, weights, unit_map). Units themselves with no
+            weights and no map by default; in large-N mode the micro-cluster
+            centroids, their unit counts and each unit's micro-cluster, so
+            unit labels are point labels indexed by unit_map.
+        """
+        if self.micro_clusters is None or self.micro_clusters >= len(self.table):
+            return self.embeddings, None, None
+        if self._micro is None:
+            unit_map, centroids, counts = micro_cluster(self.embeddings, self.micro_clusters)
+            self._micro = (centroids, counts, unit_map)
+        return self._micro
+    
+    def _connectivity_graph(self):
+        """
+        Sparse kNN connectivity matrix over units (None when unstructured).
+        
+        Built once per set of embeddings (see knn_graph()).
+        """
+        if self.connectivity is None:
+            return None
+        if self._graph is None:
+            X = self.table.coords if self.connectivity == "coords" else self.embeddings
+            self._graph = knn_graph(X, self.n_neighbors, backend=self.knn_backend)
+        return self._graph
+    
+    def generate_candidate_partitions(self, n_partitions: int, n_supergeos: int, seed=None,
+                                      n_perturbed=None, n_jobs: int = 1) -> List[SupergeoSet]:
         """
         Generate multiple candidate partitions by varying clustering parameters.
         
         This implements Stage 1 of the OSD algorithm as described in the paper:
         producing a diverse set of candidate supergeo partitions.
         
+        Each partition draws from its own np.random.Generator spawned from
+        SeedSequence(seed), so the output does not depend on n_jobs and the
+        global NumPy random state is left untouched.
+        
         Args:
             n_partitions: Number of different partitions to generate
             n_supergeos: Target number of supergeos per partition
             seed: Random seed for reproducibility
+            n_perturbed: Number of candidates clustered on noise-perturbed
+                embeddings. None (default) perturbs every candidate after the
+                first and fits each from scratch. An integer k perturbs only
+                candidates 1..k; all others are cut from one linkage tree per
+                method, computed once and reused across cluster counts.
+            n_jobs: Number of worker processes for the clusterings
+                (1 = serial, -1 = all cores)
             
         Returns:
-            List of partitions, where each partition is a List[Supergeo]
+            List of partitions, where each partition is a SupergeoSet
         """
         if not hasattr(self, 'embeddings'):
             self.train_embeddings()
         
-        if seed is not None:
-            np.random.seed(seed)
-            
-        partitions = []
         linkage_methods = ['ward', 'complete', 'average']
+        points, weights, unit_map = self._clustering_points()
+        graph = self._connectivity_graph()
+        rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_partitions)]
+        noise_scale = 0.05 * np.std(self.embeddings, axis=0)
         
-        for i in range(n_partitions):
-            # Strategy: Vary clustering parameters to get diverse partitions
-            
+        # Strategy: Vary clustering parameters to get diverse partitions
+        plans = []
+        for i, rng in enumerate(rngs):
             # 1. Vary linkage criterion
             linkage = linkage_methods[i % len(linkage_methods)]
             
             # 2. Vary number of clusters slightly (±10%)
-            n_clusters_var = int(n_supergeos * (1 + np.random.uniform(-0.1, 0.1)))
-            n_clusters_var = max(2, min(len(self.geo_units) // 2, n_clusters_var))
+            n_clusters_var = int(n_supergeos * (1 + rng.uniform(-0.1, 0.1)))
+            n_clusters_var = max(2, min(len(self.table) // 2, len(points), n_clusters_var))
             
             # 3. Add small random perturbations to embeddings
-            perturbed_embeddings = self.embeddings.copy()
-            if i > 0:  # Keep first partition unperturbed
-                noise_scale = 0.05 * np.std(self.embeddings, axis=0)
-                noise = np.random.randn(*self.embeddings.shape) * noise_scale
-                perturbed_embeddings += noise
+            # (first partition always unperturbed)
+            perturb = i > 0 and (n_perturbed is None or i <= n_perturbed)
+            plans.append((linkage, n_clusters_var, rng if perturb else None))
+        
+        # Unperturbed candidates are cut from a shared tree when n_perturbed is set
+        fit_idx = [i for i, (_, _, rng) in enumerate(plans) if n_perturbed is None or rng is not None]
+        tree_methods = [m for m in linkage_methods
+                        if any(plan[0] == m for i, plan in enumerate(plans) if i not in fit_idx)]
+        
+        n_workers = resolve_n_jobs(n_jobs, max(len(fit_idx), len(tree_methods)))
+        executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+        try:
+            trees = dict(zip(tree_methods, run_tasks(
+                executor, _linkage_tree, [(points, m, weights, graph) for m in tree_methods])))
+            fitted = dict(zip(fit_idx, run_tasks(executor, _fit_labels, [
+                (points, plans[i][0], plans[i][1], plans[i][2], noise_scale, weights, graph) for i in fit_idx
+            ])))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        partitions = []
+        fallback = None
+        for i, (linkage, n_clusters_var, _) in enumerate(plans):
+            if i in fitted:
+                labels = fitted[i]
+            elif isinstance(trees[linkage], Exception):
+                labels = trees[linkage]
+            else:
+                labels = fcluster(trees[linkage], t=n_clusters_var, criterion='maxclust')
             
-            # Generate partition
-            try:
-                clustering = AgglomerativeClustering(
-                    n_clusters=n_clusters_var,
-                    metric='euclidean',
-                    linkage=linkage
-                )
-                labels = clustering.fit_predict(perturbed_embeddings)
-                supergeos = self._labels_to_supergeos(labels)
-                partitions.append(supergeos)
-            except Exception as e:
-                print(f"Warning: Failed to generate partition {i} with {linkage} linkage: {e}")
+            if isinstance(labels, Exception):
+                print(f"Warning: Failed to generate partition {i} with {linkage} linkage: {labels}")
                 # Fallback: use ward linkage with default n_supergeos
-                clustering = AgglomerativeClustering(
-                    n_clusters=n_supergeos,
-                    metric='euclidean',
-                    linkage='ward'
-                )
-                labels = clustering.fit_predict(self.embeddings)
-                supergeos = self._labels_to_supergeos(labels)
-                partitions.append(supergeos)
+                if fallback is None:
+                    fallback = _fit_labels(points, 'ward', min(n_supergeos, len(points)), weights=weights,
+                                           connectivity=graph)
+                labels = fallback
+            partitions.append(self._labels_to_supergeos(labels if unit_map is None else labels[unit_map]))
         
         return partitions
     
-    def _labels_to_supergeos(self, labels: np.ndarray) -> List[Supergeo]:
+    def _labels_to_supergeos(self, labels: np.ndarray) -> SupergeoSet:
         """
-        Convert cluster labels to Supergeo objects.
+        Convert cluster labels to a columnar SupergeoSet.
+        
+        Supergeos are ordered by first appearance of their label, and the
+        members of each one are listed in unit order.
         
         Args:
             labels: Cluster assignment for each geo unit
             
         Returns:
-            List of Supergeo objects
-        """
-        # Group units by label
-        groups = {}
-        for i, label in enumerate(labels):
-            if label not in groups:
-                groups[label] = []
-            groups[label].append(self.geo_units[i])
-            
-        # Create Supergeo objects
-        supergeos = []
-        for label, units in groups.items():
-            # Aggregate
-            resp = sum(u.response for u in units)
-            spend = sum(u.spend for u in units)
-            covs = {f: 0.0 for f in self.feature_names}
-            
-            # Distinguish between extensive (sum) and intensive (weighted average) variables
-            extensive_keywords = ["population", "spend", "response", "users", "count"]
-            
-            for f in self.feature_names:
-                is_extensive = any(k in f.lower() for k in extensive_keywords)
-                
-                if is_extensive:
-                    # Sum
-                    covs[f] = sum(u.covariates.get(f, 0.0) for u in units)
-                else:
-                    # Weighted Average (weighted by population if available, else simple average)
-                    values = [u.covariates.get(f, 0.0) for u in units]
-                    weights = [u.covariates.get("population", 1.0) for u in units]
-                    if sum(weights) > 0:
-                        covs[f] = np.average(values, weights=weights)
-                    else:
-                        covs[f] = np.mean(values)
-                
-            supergeos.append(Supergeo(
-                id=f"sg_{label}",
-                units=[u.id for u in units],
-                response=resp,
-                spend=spend,
-                covariates=covs
-            ))
-            
-        return supergeos
+            SupergeoSet with one row per cluster
+        """
+        labels = np.asarray(labels)
+        # Relabel clusters 0..k-1 in order of first appearance
+        uniq, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        rank = np.empty(len(uniq), dtype=np.int64)
+        rank[np.argsort(first, kind="stable")] = np.arange(len(uniq))
+        cluster = rank[inverse.ravel()]
+        
+        # CSR membership: units grouped by cluster, in unit order within each
+        unit_indices = np.argsort(cluster, kind="stable").astype(np.int32)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(cluster, minlength=len(uniq)))])
+        
+        # Per-cluster sums of every feature, plus weighted sums for intensive ones
+        n_clusters = len(uniq)
+        counts = offsets[1:] - offsets[:-1]
+        weight_sums = np.bincount(cluster, weights=self.intensive_weights, minlength=n_clusters)
+        X = np.empty((n_clusters, self.unit_values.shape[1]))
+        for k, extensive in enumerate(self.extensive):
+            values = self.unit_values[:, k]
+            if extensive:
+                X[:, k] = np.bincount(cluster, weights=values, minlength=n_clusters)
+            else:
+                weighted = np.bincount(cluster, weights=values * self.intensive_weights, minlength=n_clusters)
+                plain = np.bincount(cluster, weights=values, minlength=n_clusters)
+                # Weighted mean; simple mean where a cluster's weights sum to 0
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    X[:, k] = np.where(weight_sums > 0, weighted / weight_sums, plain / counts)
+        
+        return SupergeoSet(
+            X=X,
+            features=self.table.feature_names,
+            unit_offsets=offsets,
+            unit_indices=unit_indices,
+            unit_ids=self.unit_ids,
+            ids=np.array([f"sg_{label}" for label in uniq[np.argsort(first, kind="stable")]], dtype=object),
+        )
+
+
+def _linkage_tree(points: np.ndarray, linkage: str, weights: Optional[np.ndarray] = None,
+                  connectivity=None) -> np.ndarray:
+    """
+    Full linkage tree of the points as a scipy linkage matrix.
+    
+    Size-weighted when weights are given. With a connectivity graph the tree
+    comes from structured AgglomerativeClustering, and its heights are merge
+    ranks, so an fcluster 'maxclust' cut reproduces sklearn's cut.
+    """
+    if connectivity is not None:
+        clustering = AgglomerativeClustering(n_clusters=1, metric='euclidean', linkage=linkage,
+                                             connectivity=connectivity, compute_full_tree=True)
+        return _children_to_linkage(clustering.fit(points).children_)
+    if weights is None:
+        return linkage_tree(points, method=linkage, metric='euclidean')
+    return weighted_linkage(points, weights, linkage)
+
+def _fit_labels(embeddings: np.ndarray, linkage: str, n_clusters: int,
+                rng: np.random.Generator = None, noise_scale: np.ndarray = None,
+                weights: Optional[np.ndarray] = None, connectivity=None) -> np.ndarray:
+    """
+    Agglomerative clustering of (optionally noise-perturbed) embeddings.
+    
+    Module-level so it can be pickled into worker processes.
+    
+    Args:
+        embeddings: Unit embeddings [n_units, dim], or micro-cluster centroids
+        linkage: Linkage criterion ('ward', 'complete' or 'average')
+        n_clusters: Number of clusters
+        rng: Generator for the perturbation; None clusters the embeddings as is
+        noise_scale: Per-dimension standard deviation of the perturbation
+        weights: Size of each point; None treats every point as one unit
+        connectivity: Sparse graph limiting merges to neighbours, or None
+        
+    Returns:
+        Cluster label per point
+    """
+    if rng is not None:
+        embeddings = embeddings + rng.standard_normal(embeddings.shape) * noise_scale
+    if weights is not None:
+        return fcluster(weighted_linkage(embeddings, weights, linkage), t=n_clusters, criterion='maxclust')
+    clustering = AgglomerativeClustering(
+        n_clusters=n_clusters,
+        metric='euclidean',
+        linkage=linkage,
+        connectivity=connectivity
+    )
+    return clustering.fit_predict(embeddings)
+
+def _children_to_linkage(children: np.ndarray) -> np.ndarray:
+    """Scipy linkage matrix from sklearn merge children, with merge rank as height."""
+    n_leaves = len(children) + 1
+    sizes = np.ones(2 * n_leaves - 1)
+    for t, (a, b) in enumerate(children):
+        sizes[n_leaves + t] = sizes[a] + sizes[b]
+    Z = np.empty((len(children), 4))
+    Z[:, :2] = np.sort(children, axis=1)
+    Z[:, 2] = np.arange(1, len(children) + 1)
+    Z[:, 3] = sizes[n_leaves:]
+    return Z
+
+def _fit_epochs(run_epoch, epochs: int, patience: Optional[int], tol: float,
+                time_budget: Optional[float]) -> TrainingInfo:
+    """
+    Run run_epoch() (returning the epoch loss) until a stopping rule fires.
+    
+    Returns:
+        TrainingInfo with per-epoch losses and times and the stop reason
+    """
+    info = TrainingInfo(num_threads=_import_torch().get_num_threads())
+    start = time.time()
+    for epoch in range(epochs):
+        epoch_start = time.time()
+        info.losses.append(run_epoch())
+        info.epoch_times.append(time.time() - epoch_start)
+        
+        if patience is not None and len(info.losses) > patience:
+            # Plateau: nothing in the last patience epochs beat the earlier best by tol
+            best = min(info.losses[:-patience])
+            if min(info.losses[-patience:]) > best - tol * abs(best):
+                info.stop_reason = "plateau"
+                break
+        if time_budget is not None and epoch + 1 < epochs and \
+                time.time() - start + info.epoch_times[-1] > time_budget:
+            info.stop_reason = "time_budget"
+            break
+    return info
+
+@contextmanager
+def _torch_threads(num_threads: Optional[int]):
+    """Temporarily set torch's intra-op thread count (no-op for None)."""
+    if num_threads is None:
+        yield
+        return
+    torch = _import_torch()
+    previous = torch.get_num_threads()
+    torch.set_num_threads(num_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+def _import_torch():
+    """
+    PyTorch, imported on first GNN use so PCA-only pipelines never load it.
+    
+    Raises:
+        ImportError: torch is not installed
+    """
+    try:
+        import torch
+    except ImportError as e:
+        raise ImportError("method='gnn' needs PyTorch (pip install osd[gnn])") from e
+    return torch
@@ -0,0 +1,118 @@
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from typing import Tuple
+
+
+def micro_cluster(embeddings: np.ndarray, n_micro: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Over-cluster units into micro-clusters with MiniBatchKMeans.
+
+    First level of two-level clustering: the micro-clusters are small enough
+    that hierarchical clustering on their centroids stands in for hierarchical
+    clustering on the units themselves.
+
+    Args:
+        embeddings: Unit embeddings [n_units, dim]
+        n_micro: Number of micro-clusters (capped at n_units)
+        seed: Random state for MiniBatchKMeans
+
+    Returns:
+        Tuple of (micro-cluster label per unit in 0..m-1, centroids [m, dim],
+        unit count per micro-cluster [m]); empty micro-clusters are dropped
+    """
+    n_micro = min(n_micro, len(embeddings))
+    kmeans = MiniBatchKMeans(n_clusters=n_micro, random_state=seed, n_init=1,
+                             batch_size=4096, init_size=3 * n_micro)
+    raw = kmeans.fit_predict(embeddings)
+    used, labels = np.unique(raw, return_inverse=True)
+    counts = np.bincount(labels, minlength=len(used)).astype(float)
+    centroids = np.column_stack([
+        np.bincount(labels, weights=embeddings[:, d], minlength=len(used)) for d in range(embeddings.shape[1])
+    ]) / counts[:, None]
+    return labels, centroids, counts
+
+
+def weighted_linkage(points: np.ndarray, weights: np.ndarray, method: str = "ward") -> np.ndarray:
+    """
+    Agglomerative clustering of weighted points, as a scipy linkage matrix.
+
+    Each point stands for weights[i] units sitting at its coordinates, so the
+    result approximates clustering those units directly. Merges use the
+    Lance-Williams updates with cluster sizes taken from the weights:
+    Ward merges by increase in within-cluster sum of squares, 'average' by
+    size-weighted mean distance and 'complete' by maximum distance. Needs
+    O(m^2) memory for m points, which is why it runs on micro-cluster
+    centroids rather than units.
+
+    Args:
+        points: Coordinates [m, dim]
+        weights: Positive size of each point [m]
+        method: 'ward', 'complete' or 'average'
+
+    Returns:
+        Linkage matrix [m - 1, 4] usable with scipy.cluster.hierarchy.fcluster
+        (heights match scipy.cluster.hierarchy.linkage for unit weights)
+    """
+    if method not in ("ward", "complete", "average"):
+        raise ValueError(f"Unknown linkage method: {method}")
+    points = np.asarray(points, dtype=float)
+    n = np.asarray(weights, dtype=float).copy()
+    m = len(points)
+
+    norms = np.einsum("ij,ij->i", points, points)
+    sq = np.maximum(norms[:, None] + norms[None, :] - 2 * points @ points.T, 0.0)
+    if method == "ward":
+        # Twice the SSE increase of each merge; sqrt gives scipy's Ward height
+        D = 2 * np.outer(n, n) / (n[:, None] + n[None, :]) * sq
+    else:
+        D = np.sqrt(sq)
+    np.fill_diagonal(D, np.inf)
+
+    active = np.ones(m, dtype=bool)
+    node = np.arange(m)
+    size = np.ones(m)
+    nn = D.argmin(axis=1)
+    nn_d = D[np.arange(m), nn]
+    Z = np.empty((max(m - 1, 0), 4))
+
+    for t in range(m - 1):
+        i = int(nn_d.argmin())
+        j = int(nn[i])
+        i, j = min(i, j), max(i, j)
+        d_ij = D[i, j]
+        Z[t] = [min(node[i], node[j]), max(node[i], node[j]),
+                np.sqrt(d_ij) if method == "ward" else d_ij, size[i] + size[j]]
+
+        # Distances from every cluster to the merged one (kept in slot i)
+        with np.errstate(invalid="ignore"):
+            if method == "ward":
+                new = ((n[i] + n) * D[i] + (n[j] + n) * D[j] - n * d_ij) / (n[i] + n[j] + n)
+            elif method == "complete":
+                new = np.maximum(D[i], D[j])
+            else:
+                new = (n[i] * D[i] + n[j] * D[j]) / (n[i] + n[j])
+        new[~active] = np.inf
+        new[i] = new[j] = np.inf
+        D[i, :] = new
+        D[:, i] = new
+        D[j, :] = np.inf
+        D[:, j] = np.inf
+
+        n[i] += n[j]
+        size[i] += size[j]
+        node[i] = m + t
+        active[j] = False
+        nn_d[j] = np.inf
+
+        # Refresh nearest neighbours that pointed at the merged pair
+        stale = ((nn == i) | (nn == j)) & active
+        stale[i] = active[i]
+        rows = np.flatnonzero(stale)
+        if len(rows):
+            nn[rows] = D[rows].argmin(axis=1)
+            nn_d[rows] = D[rows, nn[rows]]
+        better = active & (new < nn_d)
+        nn[better] = i
+        nn_d[better] = new[better]
+
+    return Z
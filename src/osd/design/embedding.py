@@ -0,0 +1,183 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from scipy import sparse
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.neighbors import NearestNeighbors
+from typing import Iterator, Optional, Tuple
+
+
+def iter_chunks(n_rows: int, chunk_size: int, min_size: int = 1) -> Iterator[slice]:
+    """
+    Row slices covering 0..n_rows in chunks of chunk_size.
+
+    A trailing chunk shorter than min_size is merged into the one before it.
+    """
+    starts = list(range(0, n_rows, max(chunk_size, min_size)))
+    if len(starts) > 1 and n_rows - starts[-1] < min_size:
+        starts.pop()
+    for k, start in enumerate(starts):
+        stop = starts[k + 1] if k + 1 < len(starts) else n_rows
+        yield slice(start, stop)
+
+
+# Recently built kNN graphs, keyed by (data fingerprint, k, include_self, backend)
+_KNN_CACHE: "OrderedDict[tuple, sparse.csr_matrix]" = OrderedDict()
+KNN_CACHE_SIZE = 8
+
+
+def data_fingerprint(X: np.ndarray) -> str:
+    """Content hash of an array (shape, dtype and bytes) for cache keys."""
+    X = np.ascontiguousarray(X)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{X.shape}|{X.dtype}".encode())
+    digest.update(memoryview(X).cast("B"))
+    return digest.hexdigest()
+
+
+def clear_knn_cache():
+    """Drop every cached kNN graph."""
+    _KNN_CACHE.clear()
+
+
+def knn_graph(X: np.ndarray, n_neighbors: int, include_self: bool = False,
+              backend: str = "exact", cache: bool = True) -> sparse.csr_matrix:
+    """
+    Sparse k-nearest-neighbour connectivity matrix (CSR, not symmetrized).
+
+    Graphs are cached by data fingerprint, k, include_self and backend, so
+    every embedding method (and every CandidateGenerator) on the same data
+    shares one build. Treat the returned matrix as read-only.
+
+    Args:
+        X: Points [n, dim]
+        n_neighbors: Neighbours per point (capped at n - 1), counting the
+            point itself when include_self is True
+        include_self: Whether each point is its own first neighbour
+        backend: 'exact' (KD-tree in low dimensions, ball tree otherwise) or
+            'nndescent' (approximate, needs pynndescent; falls back to
+            'exact' when it is not installed)
+        cache: Look up and store the graph in the module-level cache
+
+    Returns:
+        scipy.sparse CSR matrix [n, n] with ones on neighbour entries
+    """
+    if backend not in ("exact", "nndescent"):
+        raise ValueError(f"Unknown kNN backend: {backend}")
+    X = np.asarray(X)
+    k = min(n_neighbors, len(X) - 1)
+    key = (data_fingerprint(X), k, include_self, backend) if cache else None
+    if key is not None and key in _KNN_CACHE:
+        _KNN_CACHE.move_to_end(key)
+        return _KNN_CACHE[key]
+
+    if backend == "nndescent":
+        try:
+            graph = _nndescent_graph(X, k, include_self)
+        except ImportError:
+            print("Warning: pynndescent not installed, building an exact kNN graph")
+            backend = "exact"
+    if backend == "exact":
+        algorithm = "kd_tree" if X.shape[1] <= 15 else "ball_tree"
+        nn = NearestNeighbors(n_neighbors=k, algorithm=algorithm).fit(X)
+        # Querying with X returns each point as its own first neighbour;
+        # querying the fitted index (X=None) leaves it out
+        graph = nn.kneighbors_graph(X if include_self else None, mode="connectivity")
+
+    if key is not None:
+        _KNN_CACHE[key] = graph
+        while len(_KNN_CACHE) > KNN_CACHE_SIZE:
+            _KNN_CACHE.popitem(last=False)
+    return graph
+
+
+def _nndescent_graph(X: np.ndarray, k: int, include_self: bool) -> sparse.csr_matrix:
+    """Approximate kNN graph from NN-descent, in the same layout as the exact one."""
+    from pynndescent import NNDescent
+
+    n = len(X)
+    indices, _ = NNDescent(X, n_neighbors=min(k + 1, n), random_state=0).neighbor_graph
+    rows = np.arange(n)[:, None]
+    # Drop each point from its own list, keep the first k (or k - 1 plus itself)
+    n_other = k - 1 if include_self else k
+    keep = (indices != rows) & (indices >= 0)
+    keep &= np.cumsum(keep, axis=1) <= n_other
+    cols = [indices[keep].reshape(n, n_other)]
+    if include_self:
+        cols.insert(0, rows)
+    cols = np.hstack(cols)
+    return sparse.csr_matrix((np.ones(cols.size), cols.ravel(), np.arange(0, cols.size + 1, cols.shape[1])),
+                             shape=(n, n))
+
+
+def streaming_moments(X, chunk_size: int = 10000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Column means and (population) standard deviations in one pass over row chunks.
+
+    Chunk statistics are merged with Chan et al.'s parallel update, so only one
+    chunk is in memory at a time and the result does not suffer from the
+    cancellation of a naive sum-of-squares pass.
+
+    Args:
+        X: Array-like [n_rows, n_features] supporting row slicing
+            (ndarray, np.memmap, h5py dataset, ...)
+        chunk_size: Rows read per chunk
+
+    Returns:
+        Tuple of (mean, std), float64 arrays of shape [n_features]
+    """
+    count = 0
+    mean = np.zeros(X.shape[1])
+    m2 = np.zeros(X.shape[1])
+    for rows in iter_chunks(X.shape[0], chunk_size):
+        chunk = np.asarray(X[rows], dtype=np.float64)
+        n_b = len(chunk)
+        mean_b = chunk.mean(axis=0)
+        m2_b = ((chunk - mean_b) ** 2).sum(axis=0)
+        delta = mean_b - mean
+        total = count + n_b
+        mean = mean + delta * n_b / total
+        m2 = m2 + m2_b + delta ** 2 * count * n_b / total
+        count = total
+    return mean, np.sqrt(m2 / max(count, 1))
+
+
+def pca_embeddings(X, n_components: int, solver: str = "auto", chunk_size: int = 10000,
+                   moments: Optional[Tuple[np.ndarray, np.ndarray]] = None, seed: int = 0) -> np.ndarray:
+    """
+    Standardize X and project it onto its leading principal components.
+
+    Args:
+        X: Array-like [n_rows, n_features]; for 'incremental' it is only read
+            chunk by chunk, so it can be a memory-mapped array
+        n_components: Number of components
+        solver: 'auto' (sklearn's exact/randomized choice), 'randomized'
+            (randomized SVD, for wide feature sets) or 'incremental'
+            (IncrementalPCA over row chunks, out of core)
+        chunk_size: Rows per chunk for 'incremental' and the moments pass
+        moments: Precomputed (mean, std); computed with streaming_moments()
+            when None
+        seed: Random state for the randomized solver
+
+    Returns:
+        Embeddings [n_rows, n_components] (float64)
+    """
+    if moments is None:
+        moments = streaming_moments(X, chunk_size)
+    mean, std = moments
+    scale = std + 1e-6
+
+    if solver == "incremental":
+        n_components = min(n_components, X.shape[0])
+        chunks = list(iter_chunks(X.shape[0], chunk_size, min_size=n_components))
+        ipca = IncrementalPCA(n_components=n_components)
+        for rows in chunks:
+            ipca.partial_fit((np.asarray(X[rows], dtype=np.float64) - mean) / scale)
+        return np.vstack([ipca.transform((np.asarray(X[rows], dtype=np.float64) - mean) / scale)
+                          for rows in chunks])
+
+    if solver not in ("auto", "randomized"):
+        raise ValueError(f"Unknown PCA solver: {solver}")
+    pca = PCA(n_components=n_components, svd_solver=solver,
+              random_state=seed if solver == "randomized" else None)
+    return pca.fit_transform((np.asarray(X, dtype=np.float64) - mean) / scale)
@@ -0,0 +1,206 @@
+import time
+import numpy as np
+from typing import Optional, Tuple
+
+
+def balance_objective(X: np.ndarray, weights: np.ndarray, mask: np.ndarray, target: np.ndarray) -> float:
+    """
+    MILP objective Sum_k w_k * |Sum_{i in T} X_ik - Target_k| for a boolean assignment.
+    """
+    return float(np.abs(X[mask].sum(axis=0) - target) @ weights)
+
+
+def greedy_assignment(X: np.ndarray, weights: np.ndarray, n_treatment: int, share: float,
+                      deadline: Optional[float] = None, block_size: int = 16) -> np.ndarray:
+    """
+    Greedy starting point for the swap search.
+
+    Units are visited in decreasing order of weighted L1 norm (largest first,
+    as in greedy number partitioning). Each one goes to whichever group keeps
+    the running imbalance d = Sum(T) - share * Sum(T + C) smaller, until that
+    group is full. Once every unit is placed, d = Sum(T) - Target.
+
+    The per-unit loop costs a few microseconds a unit. If it passes deadline,
+    the remaining (smallest) units are placed block_size at a time instead:
+    each block gets its proportional number of treatment slots, filled by the
+    units whose move to treatment lowers the imbalance most.
+
+    Args:
+        X: Feature matrix [n, n_features] (normalized scale)
+        weights: Feature weights [n_features]
+        n_treatment: Number of units to assign to treatment
+        share: Target share of each feature total in treatment, n_t / (n_t + n_c)
+        deadline: time.perf_counter() value after which the per-unit loop
+                  stops (None = place every unit one by one)
+        block_size: Units placed together after the deadline
+
+    Returns:
+        Boolean treatment mask [n]
+    """
+    n = X.shape[0]
+    order = np.argsort(-(np.abs(X) @ weights), kind="stable")
+    mask = np.zeros(n, dtype=bool)
+    d = np.zeros(X.shape[1])
+    slots_t, slots_c = n_treatment, n - n_treatment
+
+    for pos, i in enumerate(order):
+        if deadline is not None and pos % 64 == 0 and time.perf_counter() >= deadline:
+            _block_fill(X, weights, order[pos:], slots_t, share, d, mask, block_size)
+            break
+        d_t = d + (1 - share) * X[i]
+        d_c = d - share * X[i]
+        to_treatment = slots_c == 0 or (slots_t > 0 and np.abs(d_t) @ weights <= np.abs(d_c) @ weights)
+        if to_treatment:
+            mask[i] = True
+            d = d_t
+            slots_t -= 1
+        else:
+            d = d_c
+            slots_c -= 1
+    return mask
+
+
+def _block_fill(X: np.ndarray, weights: np.ndarray, units: np.ndarray, n_treatment: int, share: float,
+                d: np.ndarray, mask: np.ndarray, block_size: int):
+    """Place units (in order) block by block, sending n_treatment of them to treatment in mask."""
+    # At most ~128 blocks, so the fill stays a few milliseconds for any n
+    block_size = max(block_size, -(-len(units) // 128))
+    # Cumulative rounding spreads the treatment slots over the blocks
+    bounds = np.arange(0, len(units) + block_size, block_size).clip(max=len(units))
+    quota = np.diff(np.round(bounds * n_treatment / max(len(units), 1)).astype(int))
+    for start, stop, k in zip(bounds[:-1], bounds[1:], quota):
+        block = units[start:stop]
+        # Start from the whole block in control; moving unit i to treatment adds X[i]
+        d_c = d - share * X[block].sum(axis=0)
+        gain = np.abs(d_c + X[block]) @ weights - np.abs(d_c) @ weights
+        chosen = block[np.argsort(gain, kind="stable")[:k]]
+        mask[chosen] = True
+        d = d_c + X[chosen].sum(axis=0)
+
+
+def swap_search(X: np.ndarray, weights: np.ndarray, n_treatment: int, n_control: int,
+                time_limit: float = 1.0, anneal: bool = False, initial: Optional[np.ndarray] = None,
+                max_block: int = 2 ** 21, max_stall: int = 50, seed=None) -> Tuple[np.ndarray, float]:
+    """
+    Improve a T/C assignment with vectorized pairwise swap moves.
+
+    Each iteration scores a block of (i in T, j in C) swaps at once. Swapping
+    i for j moves the residual r = Sum(T) - Target to r - x_i + x_j, so a block
+    of a x b candidates costs one (a, b, n_features) array. When the whole
+    neighbourhood fits in max_block it is scanned exhaustively (best-improvement
+    2-opt); otherwise random blocks of T and C are sampled, which makes this a
+    large-neighbourhood search.
+
+    The objective is the one SupergeoSolver.solve() minimizes,
+    Sum_k w_k * |Sum(T)_k - Target_k| with Target = Total * n_t / (n_t + n_c).
+    Swaps keep both group sizes fixed, so the cardinality constraint holds at
+    every step.
+
+    Args:
+        X: Feature matrix [n, n_features] (normalized scale)
+        weights: Feature weights [n_features]
+        n_treatment: Number of units to assign to treatment
+        n_control: Number of units in control (sets the target share)
+        time_limit: Wall-clock budget in seconds
+        anneal: If True, accept worsening swaps with simulated-annealing
+                (Metropolis) probability under a geometric cooling schedule
+        initial: Optional boolean mask to start from (default: greedy)
+        max_block: Maximum number of array elements scored per iteration
+                   (sampled blocks are also sized to take ~1/100 of time_limit)
+        max_stall: Without annealing, stop after this many sampled blocks
+                   in a row without improvement
+        seed: Seed or np.random.Generator for block sampling and acceptance
+
+    Returns:
+        Tuple of (best boolean treatment mask, best objective)
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n, n_features = X.shape
+    share = n_treatment / (n_treatment + n_control)
+    target = X.sum(axis=0) * share
+
+    if initial is None:
+        # At most half the budget for the start, the rest for the search
+        mask = greedy_assignment(X, weights, n_treatment, share, deadline=start + time_limit / 2)
+    else:
+        mask = np.asarray(initial, dtype=bool).copy()
+
+    t_idx = np.flatnonzero(mask)
+    c_idx = np.flatnonzero(~mask)
+    if len(t_idx) == 0 or len(c_idx) == 0:
+        return mask, balance_objective(X, weights, mask, target)
+
+    residual = X[t_idx].sum(axis=0) - target
+    cost = float(np.abs(residual) @ weights)
+    best_mask, best_cost = mask.copy(), cost
+
+    # Block size per side so that a * b * n_features <= max_block
+    max_side = max(1, int(np.sqrt(max_block / max(n_features, 1))))
+    exhaustive = len(t_idx) <= max_side and len(c_idx) <= max_side
+    # Sampled blocks start small and are resized to the time budget below
+    side = max_side if exhaustive else min(max_side, 64)
+
+    temperature0 = None
+    stall = 0
+    iter_time = 0.0
+
+    while True:
+        elapsed = time.perf_counter() - start
+        # Stop when another iteration like the last one would overrun the budget
+        if elapsed + iter_time >= time_limit:
+            break
+        tic = time.perf_counter()
+
+        if exhaustive:
+            rows = np.arange(len(t_idx))
+            cols = np.arange(len(c_idx))
+        else:
+            rows = rng.choice(len(t_idx), min(side, len(t_idx)), replace=False)
+            cols = rng.choice(len(c_idx), min(side, len(c_idx)), replace=False)
+
+        # new_residual[a, b] = residual - x_{t_a} + x_{c_b}
+        new_residual = (residual - X[t_idx[rows]])[:, None, :] + X[c_idx[cols]][None, :, :]
+        new_costs = np.abs(new_residual) @ weights
+
+        a, b = np.unravel_index(np.argmin(new_costs), new_costs.shape)
+        delta = new_costs[a, b] - cost
+
+        accept = delta < -1e-12
+        if not accept and anneal:
+            if temperature0 is None:
+                positive = new_costs[new_costs > cost] - cost
+                temperature0 = float(np.median(positive)) if positive.size else max(cost, 1e-9)
+            # Geometric cooling from temperature0 to temperature0 / 1000 over the budget
+            temperature = temperature0 * 1e-3 ** (elapsed / time_limit)
+            # Metropolis step on a random pair of the block
+            a, b = rng.integers(new_costs.shape[0]), rng.integers(new_costs.shape[1])
+            delta = new_costs[a, b] - cost
+            accept = rng.random() < np.exp(-max(delta, 0.0) / temperature)
+
+        if accept:
+            i, j = t_idx[rows[a]], c_idx[cols[b]]
+            residual = residual - X[i] + X[j]
+            cost = float(np.abs(residual) @ weights)
+            mask[i], mask[j] = False, True
+            t_idx[rows[a]], c_idx[cols[b]] = j, i
+
+        # Keep one block to about 1/100 of the budget, so the search gets
+        # many moves (and annealing a real schedule) even under tight limits
+        iter_time = time.perf_counter() - tic
+        if iter_time > time_limit / 50 and side > 16:
+            side = max(16, int(side * np.sqrt(time_limit / 50 / iter_time)))
+            exhaustive = False
+        elif not exhaustive and iter_time < time_limit / 200:
+            side = min(max_side, 2 * side)
+
+        if cost < best_cost - 1e-12:
+            best_mask, best_cost = mask.copy(), cost
+            stall = 0
+        else:
+            stall += 1
+
+        if not anneal and not accept and (exhaustive or stall >= max_stall):
+            break
+
+    return best_mask, best_cost
@@ -0,0 +1,160 @@
+import numpy as np
+from dataclasses import dataclass
+from scipy import stats
+from typing import List, Optional
+
+from osd.design.balance import batch_smd
+
+
+@dataclass
+class RerandomizationResult:
+    """Accepted draws from a rerandomization design."""
+    assignments: np.ndarray  # [n_accepted, n] boolean, True = treatment
+    scores: np.ndarray       # [n_accepted] balance criterion of each draw
+    criterion: str
+    threshold: float
+    n_draws: int             # draws made up to the last accepted one
+
+    @property
+    def n_accepted(self) -> int:
+        return len(self.assignments)
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.n_accepted / self.n_draws if self.n_draws else 0.0
+
+    def treatment_indices(self, k: int = 0) -> List[int]:
+        """Treatment indices of the k-th accepted draw."""
+        return np.flatnonzero(self.assignments[k]).tolist()
+
+
+def draw_assignments(rng: np.random.Generator, n_draws: int, n: int, n_treatment: int) -> np.ndarray:
+    """
+    Draw complete randomizations with exactly n_treatment treated units.
+
+    Each row ranks n uniform keys and treats the n_treatment smallest, which
+    is a uniform draw over all subsets of that size.
+
+    Returns:
+        Boolean matrix [n_draws, n]
+    """
+    keys = rng.random((n_draws, n))
+    treated = np.argpartition(keys, n_treatment - 1, axis=1)[:, :n_treatment]
+    mask = np.zeros((n_draws, n), dtype=bool)
+    np.put_along_axis(mask, treated, True, axis=1)
+    return mask
+
+
+def _whiten(X: np.ndarray, eps: float = 1e-10) -> np.ndarray:
+    """Center X and rotate/scale it so its sample covariance is the identity.
+
+    Directions with (near) zero variance are dropped, which amounts to using
+    the pseudo-inverse covariance in the Mahalanobis distance.
+    """
+    Xc = X - X.mean(axis=0)
+    cov = np.atleast_2d(np.cov(Xc, rowvar=False))
+    eigval, eigvec = np.linalg.eigh(cov)
+    keep = eigval > eps * max(eigval.max(), eps)
+    return Xc @ (eigvec[:, keep] / np.sqrt(eigval[keep]))
+
+
+def rerandomize(X: np.ndarray, n_treatment: int, n_accept: int = 100, criterion: str = "mahalanobis",
+                threshold: Optional[float] = None, acceptance_prob: float = 0.01,
+                weights: Optional[np.ndarray] = None, max_draws: int = 10_000_000,
+                batch_size: int = 10_000, seed=None) -> RerandomizationResult:
+    """
+    Rerandomization design: keep the first n_accept balanced random draws.
+
+    Draws complete randomizations in batches of batch_size, scores every draw
+    in the batch with array operations, and stops as soon as n_accept draws
+    pass the threshold. Memory is bounded by one [batch_size, n] batch.
+
+    Criteria:
+        'mahalanobis': M = (n_t * n_c / n) * d' Cov^-1 d, where d is the
+                       difference in group means of X (Morgan & Rubin, 2012).
+                       M is approximately chi-squared with rank(Cov) degrees
+                       of freedom, so the default threshold is the
+                       acceptance_prob quantile of that distribution.
+        'max_smd':     Largest absolute pooled-std SMD across features
+                       (default threshold 0.1).
+        'cost':        Weighted sum of absolute SMDs, as in
+                       SupergeoSolver._evaluate_cost (threshold required).
+
+    Args:
+        X: Feature matrix [n, n_features]
+        n_treatment: Number of units assigned to treatment in every draw
+        n_accept: Number of acceptable draws to keep (K)
+        criterion: 'mahalanobis', 'max_smd' or 'cost'
+        threshold: Accept draws with score <= threshold
+        acceptance_prob: Target acceptance probability for the default
+                         Mahalanobis threshold
+        weights: Per-feature weights for the 'cost' criterion
+        max_draws: Stop after this many draws even if fewer than n_accept passed
+        batch_size: Draws generated and scored per batch
+        seed: Seed or np.random.Generator
+
+    Returns:
+        RerandomizationResult with the accepted draws in the order drawn
+    """
+    X = np.asarray(X, dtype=float)
+    n = X.shape[0]
+    if not 0 < n_treatment < n:
+        raise ValueError(f"n_treatment must be between 1 and {n - 1}, got {n_treatment}")
+    rng = np.random.default_rng(seed)
+    n_control = n - n_treatment
+
+    if criterion == "mahalanobis":
+        W = _whiten(X)
+        if threshold is None:
+            threshold = float(stats.chi2.ppf(acceptance_prob, df=W.shape[1]))
+        W_total = W.sum(axis=0)
+        scale = n_treatment * n_control / n
+
+        def score(mask):
+            sum_t = mask.astype(float) @ W
+            diff = sum_t / n_treatment - (W_total - sum_t) / n_control
+            return scale * np.einsum("ij,ij->i", diff, diff)
+    elif criterion in ("max_smd", "cost"):
+        if threshold is None:
+            if criterion == "cost":
+                raise ValueError("criterion='cost' requires an explicit threshold")
+            threshold = 0.1
+
+        def score(mask):
+            smd, cost = batch_smd(mask, X, weights, chunk_size=batch_size)
+            return np.abs(smd).max(axis=1) if criterion == "max_smd" else cost
+    else:
+        raise ValueError(f"Unknown criterion: {criterion}")
+
+    accepted, accepted_scores = [], []
+    n_found = 0
+    n_draws = 0
+    while n_found < n_accept and n_draws < max_draws:
+        size = min(batch_size, max_draws - n_draws)
+        mask = draw_assignments(rng, size, n, n_treatment)
+        scores = score(mask)
+
+        ok = np.flatnonzero(scores <= threshold)
+        needed = n_accept - n_found
+        if len(ok) >= needed:
+            # Count only the draws up to the last one we keep
+            ok = ok[:needed]
+            n_draws += int(ok[-1]) + 1
+        else:
+            n_draws += size
+        if len(ok):
+            accepted.append(mask[ok])
+            accepted_scores.append(scores[ok])
+            n_found += len(ok)
+
+    if n_found < n_accept:
+        print(f"Warning: only {n_found} of {n_accept} draws met the {criterion} threshold "
+              f"{threshold:.4g} after {n_draws} draws")
+
+    return RerandomizationResult(
+        assignments=np.concatenate(accepted) if accepted else np.zeros((0, n), dtype=bool),
+        scores=np.concatenate(accepted_scores) if accepted_scores else np.zeros(0),
+        criterion=criterion,
+        threshold=threshold,
+        n_draws=n_draws,
+    )
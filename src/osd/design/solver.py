@@ -1,48 +1,85 @@
+import time
 import numpy as np
-from scipy.optimize import milp, LinearConstraint, Bounds
+from scipy import sparse
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+
+from osd.design.backends import MILPModel, get_backend
+from osd.design.balance import BalanceTracker, batch_smd
+from osd.design.heuristic import swap_search
+from osd.design.rerandomization import RerandomizationResult, rerandomize
+from osd.utils.data_structures import Supergeo, SupergeoSet
+from osd.utils.parallel import resolve_n_jobs, run_tasks
+
+# A partition is a SupergeoSet or, for backward compatibility, a list of Supergeo
+Partition = Union[SupergeoSet, List[Supergeo]]
 
 @dataclass
-class Supergeo:
-    id: str
-    units: List[str] # Unit IDs
-    response: float
-    spend: float
-    covariates: Dict[str, float] # e.g. {"pop": 1000, "income": 50000}
+class SolveResult:
+    """
+    Assignment plus solver telemetry from SupergeoSolver.solve().
     
-    @property
-    def size(self):
-        return len(self.units)
+    status is the backend's normalized status ('optimal', 'time_limit',
+    'infeasible', ...) even when the heuristic fallback produced the
+    assignment; fallback_used says whether it did. objective is the MILP
+    objective of the returned assignment. mip_gap, dual_bound and
+    node_count are None when the backend does not report them.
+    """
+    treatment_indices: List[int]
+    status: str
+    objective: Optional[float]
+    backend: str
+    build_time: float       # seconds spent assembling the MILP
+    solve_time: float       # seconds inside the backend
+    wall_time: float        # total seconds, including any fallback
+    fallback_used: bool = False
+    mip_gap: Optional[float] = None
+    dual_bound: Optional[float] = None
+    node_count: Optional[int] = None
+    message: str = ""
+    cost: Optional[float] = None  # weighted |SMD| cost, filled by solve_multi_partition
+    
+    def to_dict(self) -> Dict:
+        """Telemetry as a flat dict (without the indices), e.g. for a results CSV row."""
+        return {k: v for k, v in self.__dict__.items() if k != "treatment_indices"}
 
 class SupergeoSolver:
     """
     Exact solver for assigning Supergeos to Treatment/Control
     using Mixed-Integer Linear Programming (MILP).
     """
-    def __init__(self, supergeos: List[Supergeo], weights: Dict[str, float] = None):
+    def __init__(self, supergeos: Partition, weights: Dict[str, float] = None, backend="scipy"):
+        if not isinstance(supergeos, SupergeoSet):
+            supergeos = SupergeoSet.from_supergeos(supergeos)
         self.supergeos = supergeos
         self.weights = weights or {"response": 1.0}
+        self.backend = backend
         self.n = len(supergeos)
         
-        # Precompute feature matrix [N_supergeos, N_features]
-        # We balance on Means. So we need sums and counts.
+        # Feature matrix [N_supergeos, N_features] comes straight from the
+        # columnar partition. We balance on Means. So we need sums and counts.
         # Features: Response, Spend, Covariates
-        self.features = ["response", "spend"] + sorted(list(supergeos[0].covariates.keys()))
-        
-        self.X = np.zeros((self.n, len(self.features)))
-        for i, sg in enumerate(supergeos):
-            self.X[i, 0] = sg.response
-            self.X[i, 1] = sg.spend
-            for k, feat in enumerate(self.features[2:]):
-                self.X[i, k+2] = sg.covariates.get(feat, 0.0)
+        self.features = list(supergeos.features)
+        self.X = supergeos.X
                 
         # Normalize features for numerical stability in MILP
         # Note: This normalization is for optimization only.
         # True SMD calculation uses pooled within-group std (see calculate_smd method)
-        self.means = self.X.mean(axis=0)
-        self.stds = self.X.std(axis=0) + 1e-6
+        if self.n:
+            self.means = self.X.mean(axis=0)
+            self.stds = self.X.std(axis=0) + 1e-6
+        else:
+            self.means = np.zeros(len(self.features))
+            self.stds = np.ones(len(self.features))
         self.X_norm = (self.X - self.means) / self.stds
+        
+        # Sparse MILP constraint blocks, built lazily on the first solve and
+        # reused across calls (they depend on X_norm only).
+        self._constraints = None
+        
+        # Per-partition SolveResults from the last solve_multi_partition call
+        self.partition_results: List[Optional[SolveResult]] = []
     
     def calculate_smd(self, vals_a, vals_b):
         """
@@ -74,7 +111,8 @@ class SupergeoSolver:
         
         return (mean_a - mean_b) / pooled_std
 
-    def solve(self, n_treatment: int, n_control: int, time_limit: float = 30.0):
+    def solve(self, n_treatment: int, n_control: int, time_limit: float = 30.0, backend=None,
+              return_result: bool = False, fallback_time_limit: Optional[float] = None):
         """
         Assign supergeos to Treatment (1) or Control (0).
         
@@ -96,81 +134,209 @@ class SupergeoSolver:
         Subject to:
         -u_k <= Sum(x_i * V_ik) - Target_k <= u_k
         Sum(x_i) = n_treatment
+        
+        The model is built by build_model() and handed to the MILP backend
+        (see osd.design.backends): 'scipy' (default), 'highspy', 'cpsat' or 'cbc'.
+        
+        Args:
+            n_treatment: Number of supergeos to assign to treatment
+            n_control: Number of supergeos to assign to control
+            time_limit: Backend time limit in seconds
+            backend: Backend name or instance (default: the solver's backend)
+            return_result: Return a SolveResult with status, gap, bound, node
+                           count, timings and fallback flag instead of the
+                           bare index list (nothing is printed when the
+                           backend stops short of optimality; check
+                           status, message and fallback_used)
+            fallback_time_limit: Budget for the heuristic fallback
+                                 (default: min(time_limit, 1.0))
+            
+        Returns:
+            List of treatment indices, or a SolveResult if return_result
         """
-        n_features = len(self.features)
+        start = time.perf_counter()
+        backend = get_backend(backend or self.backend)
+        model = self.build_model(n_treatment, n_control)
+        build_time = time.perf_counter() - start
+        result = backend.solve(model, time_limit)
+        solve_time = time.perf_counter() - start - build_time
+        
+        fallback_used = not result.success
+        if fallback_used:
+            # Fallback: swap heuristic, warm-started from the MILP incumbent
+            # when the backend found one before hitting the time limit
+            initial = result.x[:self.n] > 0.5 if result.has_solution else None
+            if fallback_time_limit is None:
+                fallback_time_limit = min(time_limit, 1.0)
+            heuristic = self.solve_heuristic(n_treatment, n_control, time_limit=fallback_time_limit,
+                                             initial=initial, return_result=True)
+            treatment_indices, objective = heuristic.treatment_indices, heuristic.objective
+        else:
+            treatment_indices = np.flatnonzero(result.x[:self.n] > 0.5).tolist()
+            objective = result.objective
+        
+        if not return_result:
+            return treatment_indices
+        return SolveResult(
+            treatment_indices=treatment_indices,
+            status=result.status,
+            objective=objective,
+            backend=backend.name,
+            build_time=build_time,
+            solve_time=solve_time,
+            wall_time=time.perf_counter() - start,
+            fallback_used=fallback_used,
+            mip_gap=result.mip_gap,
+            dual_bound=result.dual_bound,
+            node_count=result.node_count,
+            message=result.message,
+        )
+
+    def build_model(self, n_treatment: int, n_control: int) -> MILPModel:
+        """
+        Assemble the assignment MILP in solver-neutral form.
         
-        # Problem dimension: n binaries (x) + n_features continuous (u)
-        # Vector structure: [x_0...x_n-1, u_0...u_k-1]
+        The constraint matrices come from the per-solver cache; only the
+        targets and the objective weights are computed here.
         
-        c = np.concatenate([np.zeros(self.n), np.ones(n_features)])
+        Args:
+            n_treatment: Number of supergeos to assign to treatment
+            n_control: Number of supergeos to assign to control
+            
+        Returns:
+            MILPModel over [x_0...x_n-1, u_0...u_k-1]
+        """
+        n_features = len(self.features)
         
-        # Adjust weights
-        # weights dict maps feature name to weight.
-        w_vec = np.ones(n_features)
-        for i, f in enumerate(self.features):
-            if f in self.weights:
-                w_vec[i] = self.weights[f]
-        c[self.n:] = w_vec
+        # Objective: zero cost on x, feature weights on u
+        c = np.concatenate([np.zeros(self.n), self._weight_vector()])
         
         # Targets
         # Total sum of each feature
         total_sum = self.X_norm.sum(axis=0)
         target_sum = total_sum * (n_treatment / (n_treatment + n_control))
         
-        # Constraints
+        # Constraints (matrices are cached; only the right-hand sides change)
         # 1. Cardinality: Sum(x) = n_treatment
-        A_eq = np.zeros((1, self.n + n_features))
-        A_eq[0, :self.n] = 1
-        b_eq = np.array([n_treatment])
-        
-        # 2. Balance Constraints (Inequalities)
-        # -u_k <= Sum(x * v_k) - Target <= u_k
-        # Rewritten:
-        # Sum(x * v_k) - u_k <= Target
-        # -Sum(x * v_k) - u_k <= -Target
-        
-        A_ub = np.zeros((2 * n_features, self.n + n_features))
-        b_ub = np.zeros(2 * n_features)
-        
-        for k in range(n_features):
-            # Row 1: Sum - u <= Target
-            A_ub[2*k, :self.n] = self.X_norm[:, k]
-            A_ub[2*k, self.n + k] = -1
-            b_ub[2*k] = target_sum[k]
-            
-            # Row 2: -Sum - u <= -Target
-            A_ub[2*k+1, :self.n] = -self.X_norm[:, k]
-            A_ub[2*k+1, self.n + k] = -1
-            b_ub[2*k+1] = -target_sum[k]
+        # 2. Balance: Sum(x * v_k) - u_k <= Target_k and -Sum(x * v_k) - u_k <= -Target_k
+        A_eq, A_ub = self._constraint_matrices()
+        b_eq = np.array([n_treatment], dtype=float)
+        b_ub = np.concatenate([target_sum, -target_sum])
             
         # Variable Bounds
         # x in [0, 1], u in [0, inf]
         integrality = np.concatenate([np.ones(self.n), np.zeros(n_features)]) # 1=Integer, 0=Continuous
-        lb = np.concatenate([np.zeros(self.n), np.zeros(n_features)])
-        ub = np.concatenate([np.ones(self.n), np.inf * np.ones(n_features)])
-        
-        # Solve
-        res = milp(c=c, constraints=[
-            LinearConstraint(A_eq, b_eq, b_eq), # Equality
-            LinearConstraint(A_ub, -np.inf, b_ub) # Inequality
-        ], integrality=integrality, bounds=Bounds(lb, ub), options={"time_limit": time_limit})
-        
-        if not res.success:
-            print(f"Optimization failed: {res.message}")
-            # Fallback: Random
-            return self._random_fallback(n_treatment)
+        lb = np.zeros(self.n + n_features)
+        ub = np.concatenate([np.ones(self.n), np.full(n_features, np.inf)])
+        
+        return MILPModel(c=c, A_eq=A_eq, b_eq=b_eq, A_ub=A_ub, b_ub=b_ub,
+                         lb=lb, ub=ub, integrality=integrality)
+
+    def solve_heuristic(self, n_treatment: int, n_control: int, time_limit: float = 1.0,
+                        anneal: bool = False, initial: Optional[np.ndarray] = None, seed=None,
+                        return_result: bool = False):
+        """
+        Assign supergeos with a greedy start and pairwise T/C swap search.
+        
+        Minimizes the same weighted L1 objective as solve() under the same
+        cardinality constraint, but without branch-and-bound, so it returns
+        within time_limit even for 10k+ supergeos. See
+        osd.design.heuristic.swap_search for the move evaluation.
+        
+        Args:
+            n_treatment: Number of supergeos to assign to treatment
+            n_control: Number of supergeos to assign to control
+            time_limit: Wall-clock budget in seconds
+            anneal: Use simulated-annealing acceptance instead of pure descent
+            initial: Optional boolean treatment mask to start from
+            seed: Random seed for the search
+            return_result: Return a SolveResult (status 'heuristic') with the
+                           MILP objective of the assignment and its run time
             
-        x_sol = res.x[:self.n]
-        treatment_indices = np.where(x_sol > 0.5)[0]
-        return treatment_indices.tolist()
+        Returns:
+            List of treatment indices, or a SolveResult if return_result
+        """
+        start = time.perf_counter()
+        mask, objective = swap_search(self.X_norm, self._weight_vector(), n_treatment, n_control,
+                                      time_limit=time_limit, anneal=anneal, initial=initial, seed=seed)
+        treatment_indices = np.flatnonzero(mask).tolist()
+        if not return_result:
+            return treatment_indices
+        elapsed = time.perf_counter() - start
+        return SolveResult(treatment_indices=treatment_indices, status="heuristic", objective=objective,
+                           backend="heuristic", build_time=0.0, solve_time=elapsed, wall_time=elapsed)
 
-    def _random_fallback(self, n_treatment):
-        # Not implemented fully, just random for safety
-        return np.random.choice(self.n, n_treatment, replace=False).tolist()
+    def _weight_vector(self):
+        """Map the weights dict onto the feature order (missing features get 1.0)."""
+        if not isinstance(self.weights, dict):
+            return np.ones(len(self.features))
+        return np.array([self.weights.get(f, 1.0) for f in self.features], dtype=float)
+    
+    def _constraint_matrices(self):
+        """
+        Build (once) the sparse constraint matrices of the assignment MILP.
+        
+        The balance block stacks [X_norm^T, -I] on top of [-X_norm^T, -I], so
+        row k bounds Sum(x * v_k) - u_k from above and row F + k bounds its
+        negation. Neither matrix depends on n_treatment, n_control or the
+        weights, so they are cached and reused by every call to solve().
+        
+        Returns:
+            Tuple of (A_eq, A_ub) as CSR matrices
+        """
+        if self._constraints is None:
+            n_features = len(self.features)
+            X_t = sparse.csr_matrix(self.X_norm.T)
+            neg_eye = -sparse.identity(n_features, format="csr")
+            
+            A_ub = sparse.vstack([
+                sparse.hstack([X_t, neg_eye]),
+                sparse.hstack([-X_t, neg_eye]),
+            ], format="csr")
+            A_eq = sparse.csr_matrix(
+                (np.ones(self.n), (np.zeros(self.n, dtype=np.int64), np.arange(self.n))),
+                shape=(1, self.n + n_features)
+            )
+            self._constraints = (A_eq, A_ub)
+        return self._constraints
+
+    def rerandomize(self, n_treatment: int, n_accept: int = 100, criterion: str = "mahalanobis",
+                    threshold: Optional[float] = None, acceptance_prob: float = 0.01,
+                    max_draws: int = 10_000_000, batch_size: int = 10_000,
+                    seed=None) -> RerandomizationResult:
+        """
+        Randomization-based alternative to solve(): rerandomization on X_norm.
+        
+        Draws complete randomizations of this partition with n_treatment
+        supergeos in treatment and keeps the first n_accept draws whose
+        balance passes the threshold. The accepted draws are a known
+        assignment distribution for randomization inference. See
+        osd.design.rerandomization.rerandomize for the criteria.
+        
+        Args:
+            n_treatment: Number of supergeos to assign to treatment
+            n_accept: Number of acceptable draws to keep
+            criterion: 'mahalanobis', 'max_smd' or 'cost'
+            threshold: Acceptance threshold (criterion-specific default if None)
+            acceptance_prob: Target acceptance rate for the default Mahalanobis threshold
+            max_draws: Upper bound on the number of draws
+            batch_size: Draws scored per vectorized batch (bounds memory)
+            seed: Random seed
+            
+        Returns:
+            RerandomizationResult with the accepted assignments and their scores
+        """
+        return rerandomize(self.X_norm, n_treatment, n_accept=n_accept, criterion=criterion,
+                           threshold=threshold, acceptance_prob=acceptance_prob,
+                           weights=self._weight_vector(), max_draws=max_draws,
+                           batch_size=batch_size, seed=seed)
     
-    def solve_multi_partition(self, candidate_partitions: List[List[Supergeo]], 
+    def solve_multi_partition(self, candidate_partitions: List[Partition], 
                              n_treatment: int, n_control: int, 
-                             time_limit: float = 30.0, verbose: bool = False):
+                             time_limit: float = 30.0, verbose: bool = False,
+                             n_jobs: int = 1, prune: bool = False,
+                             n_finalists: Optional[int] = None,
+                             time_budget: Optional[float] = None):
         """
         Solve the multi-partition selection problem as described in the paper.
         
@@ -178,66 +344,177 @@ class SupergeoSolver:
         - For each candidate partition, solve optimal T/C assignment
         - Select the partition with minimum cost
         
+        Every partition is solved by its own SupergeoSolver, so this solver is
+        never modified while partitions are evaluated. With n_jobs != 1 the
+        partitions are sent to a process pool; the winner is chosen in
+        partition order exactly as in the serial loop, so both modes return
+        the same partition.
+        
+        n_finalists is the screen that skips partitions unlikely to win:
+        every partition is first assigned by the swap heuristic (a fraction
+        of a second each) and only the n_finalists with the lowest heuristic
+        SMD cost get a full MILP solve. The others keep their heuristic
+        assignment. MILP objectives are not compared across partitions, since
+        each one is on its own partition's normalized scale.
+        
+        prune adds an early exit: SMD cost is never negative, so once some
+        partition is balanced exactly (cost 0, found by the n_finalists
+        screen or a MILP solve) no other can beat it and the remaining
+        partitions are skipped. Partitions are then solved in waves of
+        n_jobs so the check runs between waves.
+        
+        With time_budget, the whole call shares one deadline instead of
+        giving every partition time_limit (n_partitions * time_limit in the
+        worst case). The budget is spread by successive halving over
+        ceil(log2(n)) + 1 rounds: every partition first gets a short solve,
+        then the better half by SMD cost is re-solved with the next round's
+        larger per-solve limit, and so on. Each partition keeps its
+        lowest-cost result, partitions already solved to optimality are not
+        re-solved, and time_limit caps any single solve. Process start-up and
+        model building are not budgeted, so the deadline can be overrun by
+        roughly one model build per partition.
+        
+        The n_finalists screen ranks by heuristic cost, while the winner is
+        still the partition with the lowest MILP-assigned SMD cost, so it
+        trades a small chance of missing the best partition for fewer MILP
+        runs. prune never changes the winner's cost.
+        
+        Per-partition telemetry is kept in self.partition_results: one
+        SolveResult (with cost filled in) per partition, in partition order.
+        Partitions that were screened out carry their heuristic result
+        (status 'heuristic'); entries are None where the partition raised or
+        was pruned without a heuristic result.
+        
         Args:
-            candidate_partitions: List of partitions (each is a List[Supergeo])
+            candidate_partitions: List of partitions (each a SupergeoSet or List[Supergeo])
             n_treatment: Number of supergeos to assign to treatment
             n_control: Number of supergeos to assign to control
             time_limit: Time limit per partition optimization
             verbose: Print progress information
+            n_jobs: Number of worker processes (1 = serial, -1 = all cores)
+            prune: Skip the remaining partitions once one is balanced exactly
+            n_finalists: Run the MILP only on this many partitions, chosen by
+                         heuristic SMD cost (None = all partitions)
+            time_budget: Overall wall-clock budget in seconds for the call,
+                         shared out by successive halving (None = time_limit
+                         per partition)
             
         Returns:
             Tuple of (best_partition_idx, treatment_indices, best_cost)
         """
+        start = time.perf_counter()
+        deadline = start + time_budget if time_budget is not None else np.inf
         best_cost = np.inf
         best_partition_idx = 0
         best_treatment_indices = []
         
+        n_partitions = len(candidate_partitions)
+        n_workers = resolve_n_jobs(n_jobs, n_partitions)
+        
         if verbose:
-            print(f"Evaluating {len(candidate_partitions)} candidate partitions...")
-        
-        for partition_idx, partition in enumerate(candidate_partitions):
-            # Temporarily set this partition as the active one
-            old_supergeos = self.supergeos
-            old_n = self.n
-            old_features = self.features
-            old_X = self.X
-            old_X_norm = self.X_norm
+            print(f"Evaluating {n_partitions} candidate partitions "
+                  f"({n_workers} worker{'s' if n_workers > 1 else ''})...")
+        
+        task_args = [(partition, self.weights, n_treatment, n_control, time_limit, self.backend)
+                     for partition in candidate_partitions]
+        
+        # Each entry is a SolveResult, the exception raised, or None if not solved
+        outcomes = [None] * n_partitions
+        executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+        try:
+            order = list(range(n_partitions))
+            if n_finalists is not None:
+                per_partition = time_limit if time_budget is None else time_budget * n_workers / n_partitions
+                heuristic_time = min(0.5, 0.1 * per_partition)
+                screens = run_tasks(executor, _screen_partition, [
+                    (partition, self.weights, n_treatment, n_control, heuristic_time)
+                    for partition in candidate_partitions
+                ])
+                outcomes = [None if isinstance(sc, Exception) else sc for sc in screens]
+                order.sort(key=lambda i: _outcome_cost(outcomes[i]))
+                order = order[:n_finalists]
+            solved = set()
             
-            try:
-                # Re-initialize solver with this partition
-                self.__init__(partition, self.weights)
-                
-                # Solve assignment for this partition
-                treatment_indices = self.solve(n_treatment, n_control, time_limit)
-                
-                # Evaluate cost
-                cost = self._evaluate_cost(treatment_indices)
-                
-                if verbose:
-                    print(f"  Partition {partition_idx}: cost = {cost:.4f}")
-                
-                # Update best if this is better
-                if cost < best_cost:
-                    best_cost = cost
-                    best_partition_idx = partition_idx
-                    best_treatment_indices = treatment_indices
+            def balanced_exactly():
+                """Whether some partition already has zero SMD cost (prune's early exit)."""
+                return prune and min(_outcome_cost(o) for o in outcomes) <= 1e-9
+            
+            def solve_batch(indices, limit, fallback_limit=None):
+                """MILP-solve the given partitions, keeping each one's lowest-cost result."""
+                solved.update(indices)
+                args = [task_args[i][:4] + (limit, self.backend, fallback_limit) for i in indices]
+                for idx, outcome in zip(indices, run_tasks(executor, _solve_partition, args)):
+                    previous = outcomes[idx]
+                    if isinstance(outcome, Exception):
+                        if not isinstance(previous, SolveResult):
+                            outcomes[idx] = outcome
+                        continue
+                    if not isinstance(previous, SolveResult) or outcome.cost <= previous.cost:
+                        outcomes[idx] = outcome
+            
+            if time_budget is None:
+                wave_size = n_workers if prune else max(len(order), 1)
+                for wave_start in range(0, len(order), wave_size):
+                    if balanced_exactly():
+                        break
+                    solve_batch(order[wave_start:wave_start + wave_size], time_limit)
+            else:
+                # Successive halving: every round gets an equal share of the
+                # remaining budget, split over that round's solves; then only
+                # the better half (by SMD cost) goes on to a longer solve.
+                candidates = list(order)
+                to_solve = list(candidates)
+                n_rounds = int(np.ceil(np.log2(max(len(candidates), 1)))) + 1
+                for round_idx in range(n_rounds):
+                    if balanced_exactly():
+                        break
+                    remaining = deadline - time.perf_counter()
+                    if not to_solve or remaining <= 0:
+                        break
+                    parallel = min(n_workers, len(to_solve))
+                    share = remaining / (n_rounds - round_idx) * parallel / len(to_solve)
+                    # Part of each share is reserved for the heuristic fallback
+                    solve_batch(to_solve, min(time_limit, 0.8 * share), 0.2 * share)
                     
-            except Exception as e:
-                if verbose:
-                    print(f"  Partition {partition_idx}: failed with error {e}")
-            finally:
-                # Restore original state
-                self.supergeos = old_supergeos
-                self.n = old_n
-                self.features = old_features
-                self.X = old_X
-                self.X_norm = old_X_norm
+                    candidates.sort(key=lambda i: _outcome_cost(outcomes[i]))
+                    candidates = candidates[:max(1, (len(candidates) + 1) // 2)]
+                    # Partitions solved to optimality stay in contention without more time
+                    to_solve = [i for i in candidates
+                                if not (isinstance(outcomes[i], SolveResult) and outcomes[i].status == "optimal")]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        if verbose and len(solved) < n_partitions:
+            print(f"  Solved the MILP for {len(solved)} of {n_partitions} partitions")
+        
+        partition_results = []
+        for partition_idx, outcome in enumerate(outcomes):
+            if outcome is None or isinstance(outcome, Exception):
+                if verbose and outcome is not None:
+                    print(f"  Partition {partition_idx}: failed with error {outcome}")
+                partition_results.append(None)
+                continue
+            
+            partition_results.append(outcome)
+            cost = outcome.cost
+            if verbose:
+                fallback = " (fallback)" if outcome.fallback_used else ""
+                print(f"  Partition {partition_idx}: cost = {cost:.4f}, "
+                      f"{outcome.status}{fallback} in {outcome.wall_time:.2f}s")
+            
+            # Update best if this is better
+            if cost < best_cost:
+                best_cost = cost
+                best_partition_idx = partition_idx
+                best_treatment_indices = outcome.treatment_indices
         
         if verbose:
             print(f"Selected partition {best_partition_idx} with cost {best_cost:.4f}")
         
         # Set the best partition as active
-        self.__init__(candidate_partitions[best_partition_idx], self.weights)
+        self.__init__(candidate_partitions[best_partition_idx], self.weights, self.backend)
+        self.partition_results = partition_results
         
         return best_partition_idx, best_treatment_indices, best_cost
     
@@ -254,24 +531,44 @@ class SupergeoSolver:
         Returns:
             Dictionary mapping feature names to SMD values
         """
-        t_idx = set(treatment_indices)
-        c_idx = set(range(self.n)) - t_idx
-        
-        if len(t_idx) == 0 or len(c_idx) == 0:
-            return {feat: np.inf for feat in self.features}
+        smds = self.balance_tracker(treatment_indices).smd()
+        return dict(zip(self.features, smds.tolist()))
+    
+    def balance_tracker(self, treatment_indices) -> BalanceTracker:
+        """
+        Incremental balance tracker for an assignment on this partition.
         
-        smds = {}
+        Every supergeo not in treatment_indices starts in control. The tracker
+        updates SMDs and cost in O(n_features) per add/remove/swap, which is
+        what local search and rerandomization loops should use instead of
+        calling evaluate_balance repeatedly.
         
-        for feat_idx, feat_name in enumerate(self.features):
-            # Get values for this feature (original scale, not normalized)
-            t_vals = self.X[list(t_idx), feat_idx]
-            c_vals = self.X[list(c_idx), feat_idx]
+        Args:
+            treatment_indices: List of supergeo indices assigned to treatment
             
-            # Compute SMD using proper formula
-            smd = self.calculate_smd(t_vals, c_vals)
-            smds[feat_name] = smd
+        Returns:
+            BalanceTracker over the original-scale feature matrix
+        """
+        return BalanceTracker(self.X, self._weight_vector(), treatment_indices)
+    
+    def evaluate_balance_batch(self, assignments: np.ndarray, chunk_size: Optional[int] = None):
+        """
+        Evaluate SMDs and weighted costs for many assignments at once.
         
-        return smds
+        Equivalent to calling evaluate_balance and _evaluate_cost per row,
+        but computed with chunked matrix products (see
+        osd.design.balance.batch_smd), so 100k+ assignments can be scored for
+        randomization inference in one call.
+        
+        Args:
+            assignments: Boolean matrix [n_assignments, n_supergeos], True = treatment
+            chunk_size: Assignments scored per matrix product (bounds memory)
+            
+        Returns:
+            Tuple of (smd matrix [n_assignments, n_features], costs [n_assignments]).
+            Columns of the SMD matrix follow self.features.
+        """
+        return batch_smd(assignments, self.X, self._weight_vector(), chunk_size)
     
     def _evaluate_cost(self, treatment_indices, use_proper_smd=True):
         """
@@ -287,31 +584,49 @@ class SupergeoSolver:
         Returns:
             Total cost (sum of weighted absolute SMDs)
         """
-        t_idx = set(treatment_indices)
-        c_idx = set(range(self.n)) - t_idx
-        
-        if len(t_idx) == 0 or len(c_idx) == 0:
+        if use_proper_smd:
+            # Use proper SMD with pooled within-group std
+            return self.balance_tracker(treatment_indices).cost()
+        
+        # Use normalized scale difference (backward compatible)
+        mask = np.zeros(self.n, dtype=bool)
+        mask[list(treatment_indices)] = True
+        if mask.all() or not mask.any():
             return np.inf
-        
-        total_cost = 0.0
-        
-        for feat_idx, feat_name in enumerate(self.features):
-            # Get values for this feature
-            t_vals = self.X[list(t_idx), feat_idx]
-            c_vals = self.X[list(c_idx), feat_idx]
-            
-            if use_proper_smd:
-                # Use proper SMD with pooled within-group std
-                smd = abs(self.calculate_smd(t_vals, c_vals))
-            else:
-                # Use normalized scale difference (backward compatible)
-                t_vals_norm = self.X_norm[list(t_idx), feat_idx]
-                c_vals_norm = self.X_norm[list(c_idx), feat_idx]
-                smd = abs(t_vals_norm.mean() - c_vals_norm.mean())
-            
-            # Apply weight
-            weight = self.weights.get(feat_name, 1.0) if isinstance(self.weights, dict) else 1.0
-            
-            total_cost += weight * smd
-        
-        return total_cost
+        diff = np.abs(self.X_norm[mask].mean(axis=0) - self.X_norm[~mask].mean(axis=0))
+        return float(diff @ self._weight_vector())
+
+def _outcome_cost(outcome) -> float:
+    """SMD cost of a partition outcome for ranking (inf if it failed or was not solved)."""
+    return outcome.cost if isinstance(outcome, SolveResult) else np.inf
+
+def _screen_partition(partition: Partition, weights: Dict[str, float], n_treatment: int,
+                      n_control: int, heuristic_time: float):
+    """
+    Cheap pre-MILP look at one candidate partition: a swap-heuristic assignment.
+    
+    Returns:
+        Heuristic SolveResult with cost set to the weighted |SMD| cost
+    """
+    solver = SupergeoSolver(partition, weights)
+    result = solver.solve_heuristic(n_treatment, n_control, time_limit=heuristic_time, seed=0,
+                                    return_result=True)
+    result.cost = solver._evaluate_cost(result.treatment_indices)
+    return result
+
+def _solve_partition(partition: Partition, weights: Dict[str, float],
+                     n_treatment: int, n_control: int, time_limit: float, backend="scipy",
+                     fallback_time_limit: Optional[float] = None):
+    """
+    Solve one candidate partition with a fresh solver.
+    
+    Module-level so it can be pickled into worker processes.
+    
+    Returns:
+        SolveResult with cost set to the weighted |SMD| cost
+    """
+    solver = SupergeoSolver(partition, weights, backend)
+    result = solver.solve(n_treatment, n_control, time_limit, return_result=True,
+                          fallback_time_limit=fallback_time_limit)
+    result.cost = solver._evaluate_cost(result.treatment_indices)
+    return result
@@ -1,7 +1,86 @@
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+
+def sparse_adjacency(adj) -> torch.Tensor:
+    """
+    Coalesced torch.sparse COO tensor from a scipy.sparse adjacency matrix.
+    
+    Args:
+        adj: scipy.sparse matrix [N, N] (e.g. a kNN connectivity graph)
+        
+    Returns:
+        float32 sparse tensor with the same non-zeros, sorted row-major
+    """
+    coo = adj.tocoo()
+    indices = torch.from_numpy(np.vstack([coo.row, coo.col]).astype(np.int64))
+    values = torch.from_numpy(coo.data.astype(np.float32))
+    # Indices come straight from a valid scipy matrix, so skip torch's checks
+    return torch.sparse_coo_tensor(indices, values, coo.shape, check_invariants=False).coalesce()
+
+
+def node_degree(adj: torch.Tensor) -> torch.Tensor:
+    """Row sums of a dense or sparse adjacency as an [N, 1] tensor, clamped at 1."""
+    if adj.is_sparse:
+        degree = torch.sparse.sum(adj, dim=1).to_dense().unsqueeze(1)
+    else:
+        degree = adj.sum(dim=1, keepdim=True)
+    return degree.clamp(min=1.0)
+
+def sample_blocks(indptr: np.ndarray, indices: np.ndarray, seeds: np.ndarray, fanouts, rng: np.random.Generator):
+    """
+    Neighbour-sampled computation graph for a batch of seed nodes.
+    
+    Starting from the seeds, each layer (last first) keeps at most fanout
+    neighbours per destination node, drawn without replacement from its CSR
+    row, and the sampled nodes become the next layer's destinations.
+    
+    Args:
+        indptr, indices: CSR structure of the adjacency [N, N]
+        seeds: Node ids whose embeddings are needed (unique)
+        fanouts: Neighbours sampled per node, one entry per GNN layer
+        rng: Generator for the sampling
+        
+    Returns:
+        Tuple of (input node ids, blocks), blocks ordered first layer to last,
+        each (sparse adj [n_dst, n_src], degree [n_dst, 1], n_dst) with the
+        destination nodes first among the sources
+    """
+    blocks = []
+    dst = np.asarray(seeds, dtype=np.int64)
+    # Global id -> position among the current sources (-1 when absent)
+    lookup = np.full(len(indptr) - 1, -1, dtype=np.int64)
+    for fanout in reversed(list(fanouts)):
+        starts, counts = indptr[dst], indptr[dst + 1] - indptr[dst]
+        offsets = np.cumsum(counts) - counts
+        row = np.repeat(np.arange(len(dst)), counts)
+        edge = np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+        if counts.max(initial=0) > fanout:
+            # Random order within each row (sort by row + U(0, 1)); keep the first fanout
+            order = np.argsort(row + rng.random(len(row)), kind="stable")
+            keep = order[np.arange(len(order)) - np.repeat(offsets, counts) < fanout]
+            row, edge = row[keep], edge[keep]
+        col = indices[edge]
+        
+        lookup[dst] = np.arange(len(dst))
+        new = np.unique(col[lookup[col] < 0])
+        lookup[new] = np.arange(len(dst), len(dst) + len(new))
+        local = lookup[col]
+        src = np.concatenate([dst, new])
+        lookup[src] = -1
+        
+        # Coalesced once here so the per-batch sparse matmuls skip it
+        adj = torch.sparse_coo_tensor(torch.from_numpy(np.vstack([row, local])),
+                                      torch.ones(len(row)), (len(dst), len(src)),
+                                      check_invariants=False).coalesce()
+        degree = torch.from_numpy(np.bincount(row, minlength=len(dst)).astype(np.float32)).unsqueeze(1)
+        blocks.append((adj, degree.clamp(min=1.0), len(dst)))
+        dst = src
+    return dst, blocks[::-1]
+
+
 class GraphSAGE(nn.Module):
     """
     A simple GraphSAGE-style GNN implemented in pure PyTorch.
@@ -29,12 +108,17 @@ class GraphSAGE(nn.Module):
         else:
             self.layers[0] = nn.Linear(in_features * 2, out_features)
 
-    def forward(self, x, adj):
+    def forward(self, x, adj, degree=None):
         """
         Args:
             x: Node features [N, in_features]
-            adj: Adjacency matrix [N, N] (normalized or raw)
+            adj: Adjacency matrix [N, N] (normalized or raw), dense or
+                torch.sparse; sparse aggregation costs O(N*k) instead of O(N^2)
+            degree: Precomputed node_degree(adj) [N, 1]; computed once per
+                call when None. Pass it to avoid recomputing across epochs.
         """
+        if degree is None:
+            degree = node_degree(adj)
         h = x
         for i, layer in enumerate(self.layers):
             # 1. Aggregation: Mean of neighbors
@@ -43,23 +127,72 @@ class GraphSAGE(nn.Module):
             # neighbor_h = adj @ h / (adj.sum(1, keepdim=True) + 1e-6)
             # But if adj is just 0/1, we need degree normalization.
             
-            degree = adj.sum(dim=1, keepdim=True).clamp(min=1.0)
-            neighbor_agg = torch.mm(adj, h) / degree
-            
-            # 2. Concatenate: [self, neighbor_agg]
-            combined = torch.cat([h, neighbor_agg], dim=1)
-            
-            # 3. Linear Transformation
-            h = layer(combined)
-            
-            # 4. Activation (except last layer)
-            if i < len(self.layers) - 1:
-                h = F.relu(h)
-                h = F.dropout(h, p=self.dropout, training=self.training)
+            if adj.is_sparse:
+                neighbor_agg = torch.sparse.mm(adj, h) / degree
             else:
-                # Last layer: Normalize embeddings to unit sphere
-                h = F.normalize(h, p=2, dim=1)
+                neighbor_agg = torch.mm(adj, h) / degree
+            h = self._combine(i, layer, h, neighbor_agg)
+                
+        return h
+    
+    def _combine(self, i, layer, h_self, neighbor_agg):
+        """Layer i update from node states and their aggregated neighbour states."""
+        # 2. Concatenate: [self, neighbor_agg]
+        combined = torch.cat([h_self, neighbor_agg], dim=1)
+        
+        # 3. Linear Transformation
+        h = layer(combined)
+        
+        # 4. Activation (except last layer)
+        if i < len(self.layers) - 1:
+            h = F.relu(h)
+            h = F.dropout(h, p=self.dropout, training=self.training)
+        else:
+            # Last layer: Normalize embeddings to unit sphere
+            h = F.normalize(h, p=2, dim=1)
+        return h
+    
+    def forward_blocks(self, x, blocks):
+        """
+        Forward pass on a neighbour-sampled computation graph.
+        
+        Args:
+            x: Features of the input nodes of blocks[0] [n_src, in_features]
+            blocks: One (adj, degree, n_dst) per layer, as from sample_blocks();
+                the first n_dst source nodes of each block are its destinations
                 
+        Returns:
+            Embeddings of the last block's destination nodes
+        """
+        h = x
+        for i, (layer, (adj, degree, n_dst)) in enumerate(zip(self.layers, blocks)):
+            neighbor_agg = torch.sparse.mm(adj, h) / degree
+            h = self._combine(i, layer, h[:n_dst], neighbor_agg)
+        return h
+    
+    @torch.no_grad()
+    def inference(self, x, adj, chunk_size=10000):
+        """
+        Full-neighbourhood embeddings computed layer by layer in row chunks.
+        
+        Equivalent to forward(x, adj) in eval mode, but only one chunk of the
+        adjacency is converted to torch at a time, so memory is O(N * hidden)
+        plus one chunk.
+        
+        Args:
+            x: Node features [N, in_features]
+            adj: scipy.sparse CSR adjacency [N, N]
+            chunk_size: Destination rows per chunk
+        """
+        degree = torch.from_numpy(np.diff(adj.indptr).astype(np.float32)).unsqueeze(1).clamp(min=1.0)
+        h = x
+        for i, layer in enumerate(self.layers):
+            out = []
+            for start in range(0, adj.shape[0], chunk_size):
+                rows = slice(start, start + chunk_size)
+                neighbor_agg = torch.sparse.mm(sparse_adjacency(adj[rows]), h) / degree[rows]
+                out.append(self._combine(i, layer, h[rows], neighbor_agg))
+            h = torch.cat(out)
         return h
 
 class ContrastiveLoss(nn.Module):
@@ -70,15 +203,39 @@ class ContrastiveLoss(nn.Module):
     def __init__(self, margin=1.0):
         super(ContrastiveLoss, self).__init__()
         self.margin = margin
+        # Positive edges of the last adjacency seen, reused while it is unchanged
+        self._adj = None
+        self._edges = None
+
+    def edges(self, adj):
+        """
+        Positive pairs and sorted edge keys (u * N + v) of an adjacency.
+        
+        Computed once per adjacency object and cached, so training loops that
+        pass the same adj every epoch pay for torch.nonzero only once.
+        
+        Returns:
+            Tuple of (positive pairs [E, 2] in row-major order, sorted keys [E])
+        """
+        if adj is not self._adj:
+            if adj.is_sparse:
+                coalesced = adj.coalesce()
+                # Coalesced indices are row-major sorted, like torch.nonzero
+                pos_indices = coalesced.indices()[:, coalesced.values() != 0].t()
+            else:
+                pos_indices = torch.nonzero(adj, as_tuple=False)
+            edge_keys = pos_indices[:, 0] * adj.size(1) + pos_indices[:, 1]
+            self._adj, self._edges = adj, (pos_indices, edge_keys)
+        return self._edges
 
     def forward(self, embeddings, adj, neg_samples=5):
         """
         Args:
             embeddings: [N, D]
-            adj: [N, N] binary adjacency
+            adj: [N, N] binary adjacency, dense or torch.sparse
         """
         # Positive pairs: Indices where adj[i,j] == 1
-        pos_indices = torch.nonzero(adj, as_tuple=False)
+        pos_indices, edge_keys = self.edges(adj)
         
         if len(pos_indices) == 0:
             return torch.tensor(0.0, requires_grad=True)
@@ -88,62 +245,66 @@ class ContrastiveLoss(nn.Module):
             perm = torch.randperm(len(pos_indices))[:10000]
             pos_indices = pos_indices[perm]
 
-        u_pos = embeddings[pos_indices[:, 0]]
-        v_pos = embeddings[pos_indices[:, 1]]
-        
-        # Minimize distance for positive pairs
-        pos_dist = F.pairwise_distance(u_pos, v_pos)
-        pos_loss = torch.mean(pos_dist ** 2)
+        # Negative sampling: one draw for all rounds. Sampled nodes that are
+        # actually neighbours of the anchor are masked out of the loss.
+        N = embeddings.size(0)
+        u_indices = pos_indices[:, 0]
+        neg_indices = torch.randint(0, N, (neg_samples, len(pos_indices)))
+        valid = self.valid_negatives(edge_keys, u_indices, neg_indices, N)
         
-        # Negative sampling: Sample from non-edges
-        # We verify negatives are not neighbors
-        neg_loss = 0
-        num_pairs = len(u_pos)
+        return self._pair_loss(embeddings, u_indices, pos_indices[:, 1], neg_indices, valid)
+
+    @staticmethod
+    def valid_negatives(edge_keys, anchors, negatives, n_nodes):
+        """
+        Mask out sampled negatives that are actually neighbours of their anchor.
         
-        # Create a mask for valid negatives if not too large
-        N = embeddings.size(0)
-        if N < 5000:
-             # For smaller graphs, we can use exact non-edge masking
-             # But for simplicity and speed in this loop, we just use rejection sampling
-             pass
-
-        for _ in range(neg_samples):
-            # Random selection
-            neg_indices = torch.randint(0, N, (num_pairs,))
-            
-            # In a full implementation, we would check against adjacency to ensure strict negatives.
-            # For soft contrastive learning, random sampling is usually sufficient noise.
-            # However, to be rigorous as requested:
-            
-            # Let's do a simple rejection check (vectorized)
-            # adj is [N, N]. We want adj[pos_indices[:,0], neg_indices] == 0
-            
-            # Note: accessing adj for batch verification might be slow if dense.
-            # Given the critique was specific, we will assume random is "good enough" if stated clearly,
-            # BUT the critique asked to "Exclude positive edges".
-            
-            # Ideally:
-            # mask = (adj[pos_indices[:, 0], neg_indices] == 0)
-            # This checks if the random negative is actually a neighbor.
-            # We only compute loss on valid negatives.
-            
-            # Since adj is dense tensor here:
-            u_indices = pos_indices[:, 0]
-            is_neighbor = adj[u_indices, neg_indices] > 0
-            
-            # If neighbor, pick another random node (simple retry once, else ignore)
-            # Efficient hack: just mask out the loss for accidental neighbors
-            
-            v_neg = embeddings[neg_indices]
-            neg_dist = F.pairwise_distance(u_pos, v_neg)
-            
-            # Valid mask (1 if NOT neighbor, 0 if neighbor)
-            valid_mask = (is_neighbor == 0).float()
-            
-            # Hinge loss * valid_mask
-            loss_per_pair = F.relu(self.margin - neg_dist) ** 2
-            neg_loss += torch.sum(loss_per_pair * valid_mask) / (torch.sum(valid_mask) + 1e-6)
+        Args:
+            edge_keys: Sorted edge keys u * n_nodes + v (as returned by edges())
+            anchors: Global node ids of the anchors [P]
+            negatives: Global node ids of the negatives of each anchor [neg_samples, P]
+            n_nodes: Number of nodes N in the graph
             
-        neg_loss /= neg_samples
+        Returns:
+            Boolean tensor [neg_samples, P], False where (anchor, negative) is an edge
+        """
+        return ~_contains(edge_keys, anchors * n_nodes + negatives)
+
+    def batch_loss(self, embeddings, anchors, positives, negatives, valid):
+        """
+        Mini-batch version of forward() on pairs sampled by the caller.
+        
+        Same objective: squared distance on positive pairs plus, for each
+        negative round, the hinge loss averaged over valid negatives.
         
-        return pos_loss + neg_loss
+        Args:
+            embeddings: Embeddings of the batch nodes [n, D]
+            anchors, positives: Local indices of the positive pairs [P]
+            negatives: Local indices of the negatives of each anchor [neg_samples, P]
+            valid: False where a negative is actually a neighbour [neg_samples, P],
+                   see valid_negatives()
+        """
+        return self._pair_loss(embeddings, anchors, positives, negatives, valid)
+
+    def _pair_loss(self, embeddings, anchors, positives, negatives, valid):
+        """Loss on index tensors: anchors/positives [P], negatives/valid [neg_samples, P]."""
+        u = embeddings[anchors]
+        
+        # Minimize distance for positive pairs
+        pos_loss = torch.mean(F.pairwise_distance(u, embeddings[positives]) ** 2)
+        
+        # Hinge on every (round, pair) at once, averaged over valid negatives per round
+        neg_dist = F.pairwise_distance(u.repeat(len(negatives), 1), embeddings[negatives.reshape(-1)])
+        loss_per_pair = F.relu(self.margin - neg_dist.view(negatives.shape)) ** 2
+        mask = valid.float()
+        neg_loss = torch.sum(loss_per_pair * mask, dim=1) / (torch.sum(mask, dim=1) + 1e-6)
+        
+        return pos_loss + neg_loss.mean()
+
+
+def _contains(sorted_keys: torch.Tensor, queries: torch.Tensor) -> torch.Tensor:
+    """Boolean mask of queries present in the sorted 1-D tensor sorted_keys."""
+    if len(sorted_keys) == 0:
+        return torch.zeros_like(queries, dtype=torch.bool)
+    pos = torch.searchsorted(sorted_keys, queries).clamp(max=len(sorted_keys) - 1)
+    return sorted_keys[pos] == queries
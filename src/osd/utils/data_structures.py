@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
 import numpy as np
 
 @dataclass
@@ -14,3 +14,283 @@ class GeoUnit:
         for f in feature_names:
             vec.append(self.covariates.get(f, 0.0))
         return np.array(vec, dtype=np.float32)
+
+@dataclass(eq=False)
+class GeoTable:
+    """
+    Columnar table of geo units.
+    
+    Holds one array per field instead of one GeoUnit object per unit, so
+    stages can read whole columns (e.g. feature_matrix()) without
+    per-unit Python calls. Converters to and from List[GeoUnit] keep the
+    object API available.
+    
+    truth holds ground-truth columns that must not be used for design
+    (e.g. "true_tau", "latent_u" from synthetic data); to_units() attaches
+    them to each GeoUnit as attributes.
+    """
+    ids: np.ndarray                   # [n] unit IDs (str)
+    response: np.ndarray              # [n] float64
+    spend: np.ndarray                 # [n] float64
+    covariates: np.ndarray            # [n, n_covariates] float64
+    covariate_names: List[str]
+    coords: Optional[np.ndarray] = None   # [n, 2] e.g. lat/long
+    truth: Dict[str, np.ndarray] = field(default_factory=dict)
+    
+    def __post_init__(self):
+        self.ids = np.asarray(self.ids, dtype=object)
+        n = len(self.ids)
+        self.response = np.asarray(self.response, dtype=np.float64)
+        self.spend = np.asarray(self.spend, dtype=np.float64)
+        self.covariates = np.asarray(self.covariates, dtype=np.float64).reshape(n, len(self.covariate_names))
+        if self.coords is not None:
+            self.coords = np.asarray(self.coords, dtype=np.float64)
+        self.truth = {k: np.asarray(v) for k, v in self.truth.items()}
+        for name, column in [("response", self.response), ("spend", self.spend),
+                             ("coords", self.coords), *self.truth.items()]:
+            if column is not None and len(column) != n:
+                raise ValueError(f"Column '{name}' has {len(column)} rows, expected {n}")
+        self._covariate_index = {f: k for k, f in enumerate(self.covariate_names)}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def feature_names(self) -> List[str]:
+        """Column names of feature_matrix()."""
+        return ["response", "spend"] + list(self.covariate_names)
+    
+    def feature_matrix(self, dtype=np.float64) -> np.ndarray:
+        """[response, spend, *covariates] per unit, as GeoUnit.to_feature_vector orders them."""
+        return np.column_stack([self.response, self.spend, self.covariates]).astype(dtype, copy=False)
+    
+    def covariate(self, name: str) -> np.ndarray:
+        """One covariate column."""
+        return self.covariates[:, self._covariate_index[name]]
+    
+    @classmethod
+    def from_units(cls, units: List[GeoUnit]) -> "GeoTable":
+        """
+        Pack GeoUnit objects.
+        
+        Covariates are taken from the first unit (sorted) and missing values
+        are 0.0. true_tau and latent_u attributes, when every unit has them,
+        become truth columns.
+        """
+        names = sorted(units[0].covariates.keys()) if units else []
+        truth = {attr: np.array([getattr(u, attr) for u in units])
+                 for attr in ("true_tau", "latent_u")
+                 if units and all(hasattr(u, attr) for u in units)}
+        return cls(
+            ids=np.array([u.id for u in units], dtype=object),
+            response=np.array([u.response for u in units], dtype=np.float64),
+            spend=np.array([u.spend for u in units], dtype=np.float64),
+            covariates=np.array([[u.covariates.get(f, 0.0) for f in names] for u in units],
+                                dtype=np.float64).reshape(len(units), len(names)),
+            covariate_names=names,
+            truth=truth,
+        )
+    
+    def to_units(self) -> List[GeoUnit]:
+        """Unpack into GeoUnit objects, with truth columns as attributes."""
+        units = []
+        for i in range(len(self)):
+            unit = GeoUnit(
+                id=str(self.ids[i]),
+                response=self.response[i],
+                spend=self.spend[i],
+                covariates={f: self.covariates[i, k] for k, f in enumerate(self.covariate_names)},
+            )
+            for name, column in self.truth.items():
+                setattr(unit, name, column[i])
+            units.append(unit)
+        return units
+    
+    @classmethod
+    def from_frame(cls, df, id_col: str = "id", response_col: str = "response", spend_col: str = "spend",
+                   covariate_cols: Optional[List[str]] = None, coord_cols: Optional[List[str]] = None,
+                   truth_cols: Optional[List[str]] = None) -> "GeoTable":
+        """
+        Build a table from a pandas DataFrame (e.g. read from CSV or Parquet).
+        
+        Args:
+            df: One row per unit
+            id_col, response_col, spend_col: Column names of the core fields
+            covariate_cols: Covariate columns (default: every other column
+                            not named as coords or truth)
+            coord_cols: Optional coordinate columns, e.g. ["lat", "long"]
+            truth_cols: Optional ground-truth columns
+        """
+        coord_cols = coord_cols or []
+        truth_cols = truth_cols or []
+        if covariate_cols is None:
+            reserved = {id_col, response_col, spend_col, *coord_cols, *truth_cols}
+            covariate_cols = [c for c in df.columns if c not in reserved]
+        covariate_cols = sorted(covariate_cols)
+        return cls(
+            ids=df[id_col].astype(str).to_numpy(dtype=object),
+            response=df[response_col].to_numpy(dtype=np.float64),
+            spend=df[spend_col].to_numpy(dtype=np.float64),
+            covariates=df[covariate_cols].to_numpy(dtype=np.float64),
+            covariate_names=covariate_cols,
+            coords=df[coord_cols].to_numpy(dtype=np.float64) if coord_cols else None,
+            truth={c: df[c].to_numpy() for c in truth_cols},
+        )
+    
+    def to_frame(self):
+        """pandas DataFrame with one column per field (coords as coord_0, coord_1, ...)."""
+        import pandas as pd
+        
+        data = {"id": self.ids, "response": self.response, "spend": self.spend}
+        data.update({f: self.covariates[:, k] for k, f in enumerate(self.covariate_names)})
+        if self.coords is not None:
+            data.update({f"coord_{k}": self.coords[:, k] for k in range(self.coords.shape[1])})
+        data.update(self.truth)
+        return pd.DataFrame(data)
+
+@dataclass
+class Supergeo:
+    id: str
+    units: List[str] # Unit IDs
+    response: float
+    spend: float
+    covariates: Dict[str, float] # e.g. {"pop": 1000, "income": 50000}
+    
+    @property
+    def size(self):
+        return len(self.units)
+
+@dataclass(eq=False)
+class SupergeoSet:
+    """
+    Columnar partition of geo units into supergeos.
+    
+    Holds one float feature matrix instead of one Supergeo object per
+    cluster, and CSR-style membership: the units of supergeo i are
+    unit_indices[unit_offsets[i]:unit_offsets[i + 1]], positions in the
+    unit table the partition was built from (and in unit_ids). Indexing
+    returns a Supergeo view, so code written against List[Supergeo] keeps
+    working.
+    
+    A set packed from Supergeo objects without that unit table has
+    positions_known=False: unit_indices then only index unit_ids (the
+    member IDs in packing order), and members() / members_of() raise
+    instead of returning positions that do not refer to any table.
+    
+    Columns of X follow features: ["response", "spend", *covariates].
+    """
+    X: np.ndarray              # [n_supergeos, n_features] float64
+    features: List[str]
+    unit_offsets: np.ndarray   # [n_supergeos + 1] int64
+    unit_indices: np.ndarray   # [n_member_units] int32
+    unit_ids: Optional[np.ndarray] = None  # unit index -> unit ID (default: str(index))
+    ids: Optional[np.ndarray] = None       # supergeo IDs (default: "sg_<i>")
+    positions_known: bool = True           # unit_indices are unit-table positions
+    
+    def __post_init__(self):
+        self.X = np.asarray(self.X, dtype=np.float64).reshape(-1, len(self.features))
+        self.unit_offsets = np.asarray(self.unit_offsets, dtype=np.int64)
+        self.unit_indices = np.asarray(self.unit_indices, dtype=np.int32)
+        if len(self.unit_offsets) != len(self.X) + 1:
+            raise ValueError(f"unit_offsets must have {len(self.X) + 1} entries, got {len(self.unit_offsets)}")
+        self._feature_index = {f: k for k, f in enumerate(self.features)}
+    
+    @classmethod
+    def from_supergeos(cls, supergeos: List[Supergeo],
+                       unit_ids: Optional[Sequence[str]] = None) -> "SupergeoSet":
+        """
+        Pack a list of Supergeo objects.
+        
+        Covariates are taken from the first supergeo (sorted), and missing
+        values are 0.0. Unit IDs are kept as given.
+        
+        Args:
+            supergeos: Supergeos to pack
+            unit_ids: IDs of the unit table, in table order (e.g. GeoTable.ids).
+                      Member IDs are mapped to their positions in it, so
+                      members() returns unit positions. Without it the
+                      positions are unknown (positions_known=False).
+        
+        Raises:
+            ValueError: If a member unit ID is not in unit_ids
+        """
+        covariates = sorted(supergeos[0].covariates.keys()) if supergeos else []
+        features = ["response", "spend"] + covariates
+        X = np.array([[sg.response, sg.spend] + [sg.covariates.get(f, 0.0) for f in covariates]
+                      for sg in supergeos], dtype=np.float64).reshape(-1, len(features))
+        sizes = np.array([len(sg.units) for sg in supergeos], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        member_ids = [str(u) for sg in supergeos for u in sg.units]
+        ids = np.array([sg.id for sg in supergeos], dtype=object)
+        if unit_ids is None:
+            return cls(X=X, features=features, unit_offsets=offsets,
+                       unit_indices=np.arange(offsets[-1], dtype=np.int32),
+                       unit_ids=np.array(member_ids, dtype=object), ids=ids, positions_known=False)
+        
+        position = {str(u): k for k, u in enumerate(unit_ids)}
+        missing = [u for u in member_ids if u not in position]
+        if missing:
+            raise ValueError(f"{len(missing)} member unit IDs are not in unit_ids, e.g. {missing[0]!r}")
+        return cls(X=X, features=features, unit_offsets=offsets,
+                   unit_indices=np.array([position[u] for u in member_ids], dtype=np.int32),
+                   unit_ids=np.asarray(unit_ids, dtype=object), ids=ids)
+    
+    def __len__(self) -> int:
+        return len(self.X)
+    
+    def __getitem__(self, i: int) -> Supergeo:
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(f"supergeo index {i} out of range for {n} supergeos")
+        i = i % n
+        members = self.unit_indices[self.unit_offsets[i]:self.unit_offsets[i + 1]]
+        row = self.X[i]
+        return Supergeo(
+            id=str(self.ids[i]) if self.ids is not None else f"sg_{i}",
+            units=[str(u) for u in self.unit_ids[members]] if self.unit_ids is not None
+            else [str(u) for u in members],
+            response=float(row[0]),
+            spend=float(row[1]),
+            covariates={f: float(v) for f, v in zip(self.features[2:], row[2:])},
+        )
+    
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+    
+    @property
+    def n_features(self) -> int:
+        return len(self.features)
+    
+    @property
+    def sizes(self) -> np.ndarray:
+        """Number of units in each supergeo."""
+        return np.diff(self.unit_offsets)
+    
+    def column(self, feature: str) -> np.ndarray:
+        """Values of one feature across supergeos."""
+        return self.X[:, self._feature_index[feature]]
+    
+    def members_of(self, i: int) -> np.ndarray:
+        """Unit indices of supergeo i."""
+        self._check_positions()
+        return self.unit_indices[self.unit_offsets[i]:self.unit_offsets[i + 1]]
+    
+    def members(self, supergeo_indices) -> np.ndarray:
+        """Unit indices of all the given supergeos, concatenated in the given order."""
+        self._check_positions()
+        supergeo_indices = np.asarray(supergeo_indices, dtype=np.int64)
+        starts = self.unit_offsets[supergeo_indices]
+        lengths = self.unit_offsets[supergeo_indices + 1] - starts
+        ends = np.cumsum(lengths)
+        # Position of every member in unit_indices, without a loop over supergeos
+        positions = np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - lengths), lengths)
+        return self.unit_indices[positions]
+    
+    def _check_positions(self):
+        if not self.positions_known:
+            raise ValueError("Unit positions are unknown for a set packed without a unit table; "
+                             "pass unit_ids to SupergeoSet.from_supergeos")
+    
+    def to_supergeos(self) -> List[Supergeo]:
+        """Unpack into Supergeo objects (for code that needs mutable objects)."""
+        return list(self)
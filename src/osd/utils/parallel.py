@@ -0,0 +1,46 @@
+import os
+from concurrent.futures import Executor
+from typing import Optional
+
+
+def resolve_n_jobs(n_jobs: int, n_tasks: int) -> int:
+    """
+    Translate an sklearn-style ``n_jobs`` value into a worker count.
+    
+    Args:
+        n_jobs: Number of workers. -1 uses every core, -2 all but one, etc.
+        n_tasks: Number of tasks to run (no point starting more workers)
+        
+    Returns:
+        Number of workers, at least 1 and at most n_tasks
+    """
+    if n_jobs is None or n_jobs == 0:
+        n_jobs = 1
+    if n_jobs < 0:
+        n_jobs = max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, min(n_jobs, n_tasks))
+
+
+def run_tasks(executor: Optional[Executor], fn, task_args) -> list:
+    """
+    Run fn(*args) for every entry of task_args, inline or on the executor.
+    
+    Returns:
+        Results in task order; a task that raised yields its exception
+    """
+    outcomes = []
+    if executor is None:
+        for args in task_args:
+            try:
+                outcomes.append(fn(*args))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+    
+    futures = [executor.submit(fn, *args) for args in task_args]
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes
@@ -1,9 +1,10 @@
 import numpy as np
-from typing import List
-from osd.utils.data_structures import GeoUnit
+from typing import List, Union
+from osd.utils.data_structures import GeoTable, GeoUnit
 
 def generate_synthetic_data(n_units=200, effect_size=0.1, heterogeneity=0.5, 
-                          spatial_confounding=0.0, non_linear_effect=False, seed=None) -> List[GeoUnit]:
+                          spatial_confounding=0.0, non_linear_effect=False, seed=None,
+                          as_table=False) -> Union[List[GeoUnit], GeoTable]:
     """
     Generates synthetic geographic data with optional adversarial features.
     
@@ -16,6 +17,9 @@ def generate_synthetic_data(n_units=200, effect_size=0.1, heterogeneity=0.5,
                              1.0 = Heterogeneity driven entirely by unobserved spatial variable
         non_linear_effect: If True, treatment effect depends on quadratic/interaction terms
         seed: Random seed for reproducibility (optional). If None, uses current random state.
+        as_table: Return a columnar GeoTable (with coords and the true_tau /
+                  latent_u truth columns) instead of a list of GeoUnit objects.
+                  Both hold the same values for the same seed.
     """
     if seed is not None:
         np.random.seed(seed)
@@ -89,21 +93,15 @@ def generate_synthetic_data(n_units=200, effect_size=0.1, heterogeneity=0.5,
     
     tau = effect_size * spend * (1 + heterogeneity * combined_driver)
     
-    units = []
-    for i in range(n_units):
-        units.append(GeoUnit(
-            id=str(i),
-            response=revenue[i],
-            spend=spend[i],
-            covariates={
-                "population": pop[i],
-                "income": income[i],
-                # Hidden from the model: "spatial_U": U[i],
-                # Hidden from the model: "true_lift": tau[i] / spend[i]
-            }
-        ))
-        # Attach truth for evaluation (but not in covariates dict)
-        units[-1].true_tau = tau[i]
-        units[-1].latent_u = U[i]
-        
-    return units
+    table = GeoTable(
+        ids=np.array([str(i) for i in range(n_units)], dtype=object),
+        response=revenue,
+        spend=spend,
+        covariates=np.column_stack([income, pop]),
+        covariate_names=["income", "population"],
+        # Hidden from the model: "spatial_U": U, "true_lift": tau / spend
+        coords=coords,
+        # Truth for evaluation (not covariates)
+        truth={"true_tau": tau, "latent_u": U},
+    )
+    return table if as_table else table.to_units()
@@ -0,0 +1,98 @@
+"""Unit tests for incremental and batched balance evaluation."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.design.balance import BalanceTracker, batch_smd
+from osd.design.solver import SupergeoSolver
+
+
+def reference_smd(X, t_idx):
+    """Per-feature SMD via the solver's two-pass calculate_smd."""
+    mask = np.zeros(len(X), dtype=bool)
+    mask[t_idx] = True
+    calc = SupergeoSolver.calculate_smd
+    return np.array([calc(None, X[mask, k], X[~mask, k]) for k in range(X.shape[1])])
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(7)
+    return np.column_stack([
+        rng.lognormal(10, 1.0, 40),   # skewed, large scale
+        rng.normal(5e4, 1e4, 40),
+        rng.uniform(0, 1, 40),
+    ])
+
+
+def test_tracker_matches_two_pass_smd(features):
+    """SMDs from running sums agree with the two-pass pooled-std formula."""
+    t_idx = list(range(0, 40, 2))
+    tracker = BalanceTracker(features, treatment_indices=t_idx)
+
+    np.testing.assert_allclose(tracker.smd(), reference_smd(features, t_idx), rtol=1e-8)
+
+
+def test_tracker_updates_after_swap_add_remove(features):
+    """Incremental updates land on the same statistics as a fresh evaluation."""
+    tracker = BalanceTracker(features, treatment_indices=range(20))
+    tracker.swap(0, 30)
+    tracker.remove(5)
+    tracker.add(5, treatment=False)
+    tracker.move(39)
+
+    t_idx = tracker.treatment_indices
+    assert sorted(t_idx) == sorted(set(range(1, 20)) - {5} | {30, 39})
+    np.testing.assert_allclose(tracker.smd(), reference_smd(features, t_idx), rtol=1e-8)
+
+
+def test_swap_cost_previews_without_mutating(features):
+    """swap_cost equals the cost after the swap and leaves the tracker unchanged."""
+    weights = np.array([2.0, 1.0, 0.5])
+    tracker = BalanceTracker(features, weights, treatment_indices=range(20))
+    before = tracker.cost()
+
+    preview = tracker.swap_cost(3, 25)
+    assert tracker.cost() == pytest.approx(before)
+
+    tracker.swap(3, 25)
+    assert tracker.cost() == pytest.approx(preview)
+
+
+def test_empty_group_is_infinite(features):
+    """An empty treatment or control group has undefined (infinite) balance."""
+    assert np.all(np.isinf(BalanceTracker(features).smd()))
+    assert BalanceTracker(features, treatment_indices=range(40)).cost() == np.inf
+
+
+def test_batch_matches_per_assignment(features):
+    """Batched SMDs and costs equal one tracker evaluation per row, across chunks."""
+    rng = np.random.default_rng(0)
+    assignments = rng.random((25, 40)) < 0.5
+    weights = np.array([1.0, 2.0, 0.5])
+
+    smd, cost = batch_smd(assignments, features, weights, chunk_size=7)
+
+    for row, mask in enumerate(assignments):
+        tracker = BalanceTracker(features, weights, np.flatnonzero(mask))
+        np.testing.assert_allclose(smd[row], tracker.smd(), rtol=1e-8)
+        assert cost[row] == pytest.approx(tracker.cost())
+
+
+def test_batch_flags_degenerate_assignments(features):
+    """Rows with all units in one group get infinite cost."""
+    assignments = np.zeros((2, 40), dtype=bool)
+    assignments[1] = True
+
+    _, cost = batch_smd(assignments, features)
+    assert np.all(np.isinf(cost))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,131 @@
+"""Unit tests for Stage 1 supergeo construction."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.utils.data_structures import GeoUnit
+from osd.design.candidate_generation import CandidateGenerator, extensive_mask
+
+
+def make_units():
+    rng = np.random.default_rng(0)
+    units = [
+        GeoUnit(id=f"u{i}", response=rng.uniform(10, 20), spend=rng.uniform(1, 2),
+                covariates={"population": rng.uniform(100, 200), "income": rng.uniform(3e4, 6e4)})
+        for i in range(12)
+    ]
+    # One cluster whose population weights sum to zero
+    for i in (9, 10, 11):
+        units[i].covariates["population"] = 0.0
+    return units
+
+
+def test_extensive_mask_classifies_by_keyword():
+    assert extensive_mask(["response", "spend", "income", "population", "Active_Users"]).tolist() == \
+        [True, True, False, True, True]
+
+
+def test_labels_to_supergeos_sums_and_weighted_means():
+    """Extensive features are summed, intensive ones population-weighted per cluster."""
+    units = make_units()
+    labels = np.array([5, 5, 2, 2, 2, 7, 7, 7, 5, 1, 1, 1])
+    supergeos = CandidateGenerator(units)._labels_to_supergeos(labels)
+
+    # Clusters appear in first-appearance order of their labels
+    assert [sg.id for sg in supergeos] == ["sg_5", "sg_2", "sg_7", "sg_1"]
+    for sg, label in zip(supergeos, [5, 2, 7, 1]):
+        members = [units[i] for i in np.flatnonzero(labels == label)]
+        assert sg.units == [u.id for u in members]
+        assert sg.response == pytest.approx(sum(u.response for u in members))
+        assert sg.covariates["population"] == pytest.approx(sum(u.covariates["population"] for u in members))
+        pops = np.array([u.covariates["population"] for u in members])
+        incomes = np.array([u.covariates["income"] for u in members])
+        expected = np.average(incomes, weights=pops) if pops.sum() > 0 else incomes.mean()
+        assert sg.covariates["income"] == pytest.approx(expected)
+
+
+def test_shared_linkage_tree_matches_refit():
+    """Unperturbed candidates cut from the cached trees equal fresh clusterings."""
+    from sklearn.cluster import AgglomerativeClustering
+
+    rng = np.random.default_rng(1)
+    units = [
+        GeoUnit(id=f"u{i}", response=rng.uniform(10, 20), spend=rng.uniform(1, 2),
+                covariates={"population": rng.uniform(100, 200), "income": rng.uniform(3e4, 6e4)})
+        for i in range(60)
+    ]
+    generator = CandidateGenerator(units)
+    partitions = generator.generate_candidate_partitions(6, 10, seed=0, n_perturbed=0)
+
+    for i, partition in enumerate(partitions):
+        method = ["ward", "complete", "average"][i % 3]
+        labels = AgglomerativeClustering(n_clusters=len(partition), linkage=method).fit_predict(generator.embeddings)
+        expected = generator._labels_to_supergeos(labels)
+        assert [sorted(partition.members_of(j)) for j in range(len(partition))] == \
+            [sorted(expected.members_of(j)) for j in range(len(expected))]
+
+
+def test_parallel_partitions_match_serial():
+    """Per-partition generators make the output independent of n_jobs and global state."""
+    generator = CandidateGenerator(make_units() * 3)
+    generator.train_embeddings()
+    state = np.random.get_state()[1].copy()
+
+    serial = generator.generate_candidate_partitions(4, 5, seed=3)
+    parallel = generator.generate_candidate_partitions(4, 5, seed=3, n_jobs=2)
+
+    assert np.array_equal(np.random.get_state()[1], state)
+    for a, b in zip(serial, parallel):
+        assert np.array_equal(a.X, b.X)
+        assert np.array_equal(a.unit_indices, b.unit_indices)
+
+
+def test_coordinate_connectivity_tree_cut_matches_fit():
+    """Structured clustering: cutting the cached tree equals a fresh constrained fit."""
+    from sklearn.cluster import AgglomerativeClustering
+    from osd.utils.synthetic_data import generate_synthetic_data
+
+    table = generate_synthetic_data(n_units=300, seed=0, as_table=True)
+    generator = CandidateGenerator(table, connectivity="coords", n_neighbors=8)
+    partitions = generator.generate_candidate_partitions(3, 20, seed=0, n_perturbed=0)
+    graph = generator._connectivity_graph()
+    assert graph.shape == (300, 300) and graph.diagonal().sum() == 0
+
+    for i, partition in enumerate(partitions):
+        method = ["ward", "complete", "average"][i]
+        labels = AgglomerativeClustering(n_clusters=len(partition), linkage=method,
+                                         connectivity=graph).fit_predict(generator.embeddings)
+        expected = generator._labels_to_supergeos(labels)
+        assert np.array_equal(partition.X, expected.X)
+
+
+def test_connectivity_option_validation():
+    with pytest.raises(ValueError):
+        CandidateGenerator(make_units(), connectivity="roads")
+    with pytest.raises(ValueError):
+        CandidateGenerator(make_units(), connectivity="coords")
+    with pytest.raises(ValueError):
+        CandidateGenerator(make_units(), connectivity="embeddings", micro_clusters=4)
+
+
+def test_pca_pipeline_does_not_import_torch():
+    """torch is only loaded when the GNN method is used."""
+    import subprocess
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from osd.design.candidate_generation import CandidateGenerator\n"
+        "from osd.utils.synthetic_data import generate_synthetic_data\n"
+        "CandidateGenerator(generate_synthetic_data(n_units=60, seed=0)).generate_supergeos(6)\n"
+        "assert 'torch' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code, str(PROJECT_ROOT / "src")], check=True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,60 @@
+"""Unit tests for weighted hierarchical clustering (large-N Stage 1)."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+from scipy.cluster.hierarchy import fcluster, is_valid_linkage, linkage
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.design.clustering import micro_cluster, weighted_linkage
+from osd.design.candidate_generation import CandidateGenerator
+from osd.utils.synthetic_data import generate_synthetic_data
+
+
+@pytest.mark.parametrize("method", ["ward", "complete", "average"])
+def test_weighted_linkage_matches_scipy_on_repeated_points(method):
+    """A point of weight w merges exactly like w copies of it under scipy."""
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(40, 3))
+    weights = rng.integers(1, 4, size=40)
+
+    Z = weighted_linkage(points, weights, method)
+    Z_ref = linkage(np.repeat(points, weights, axis=0), method)
+
+    assert is_valid_linkage(Z)
+    # Copies of a point merge at height 0 first; the rest must coincide
+    assert np.allclose(Z[:, 2], Z_ref[-(len(points) - 1):, 2])
+    for k in (3, 8):
+        assert len(np.unique(fcluster(Z, k, criterion="maxclust"))) == k
+
+
+def test_micro_cluster_centroids_and_counts():
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(500, 4))
+    labels, centroids, counts = micro_cluster(embeddings, 50)
+
+    assert counts.sum() == 500
+    assert np.all(counts > 0)
+    for c in range(len(centroids)):
+        assert np.allclose(centroids[c], embeddings[labels == c].mean(axis=0))
+
+
+def test_two_level_generator_covers_every_unit():
+    table = generate_synthetic_data(n_units=600, seed=0, as_table=True)
+    generator = CandidateGenerator(table, micro_clusters=120)
+
+    supergeos = generator.generate_supergeos(n_supergeos=30)
+    assert len(supergeos) == 30
+    assert np.array_equal(np.sort(supergeos.unit_indices), np.arange(600))
+
+    partitions = generator.generate_candidate_partitions(4, 30, seed=0, n_perturbed=1)
+    for partition in partitions:
+        assert np.array_equal(np.sort(partition.unit_indices), np.arange(600))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
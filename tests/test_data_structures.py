@@ -0,0 +1,128 @@
+"""Unit tests for the columnar data structures."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.utils.data_structures import GeoTable, Supergeo, SupergeoSet
+from osd.utils.synthetic_data import generate_synthetic_data
+from osd.design.candidate_generation import CandidateGenerator
+from osd.design.solver import SupergeoSolver
+
+
+def make_supergeo_list():
+    return [
+        Supergeo(id="a", units=["0", "3"], response=10.0, spend=1.0,
+                 covariates={"population": 100.0, "income": 5.0}),
+        Supergeo(id="b", units=["1"], response=20.0, spend=2.0,
+                 covariates={"population": 200.0, "income": 7.0}),
+        Supergeo(id="c", units=["2", "4", "5"], response=30.0, spend=3.0,
+                 covariates={"population": 300.0}),
+    ]
+
+
+def test_supergeo_set_round_trips_supergeo_list():
+    """Packing and indexing give back the same supergeos (missing covariates -> 0.0)."""
+    supergeos = make_supergeo_list()
+    packed = SupergeoSet.from_supergeos(supergeos)
+
+    assert len(packed) == 3
+    assert packed.features == ["response", "spend", "income", "population"]
+    np.testing.assert_array_equal(packed.sizes, [2, 1, 3])
+    assert packed[0] == supergeos[0]
+    assert packed[-1].covariates == {"income": 0.0, "population": 300.0}
+    assert [sg.id for sg in packed] == ["a", "b", "c"]
+    with pytest.raises(IndexError):
+        packed[3]
+
+
+def test_supergeo_set_members_follow_csr_offsets():
+    """members() concatenates the CSR slices of the requested supergeos."""
+    packed = SupergeoSet(
+        X=np.zeros((3, 2)), features=["response", "spend"],
+        unit_offsets=[0, 2, 3, 6], unit_indices=[4, 0, 5, 1, 2, 3],
+    )
+    assert packed.unit_indices.dtype == np.int32
+    np.testing.assert_array_equal(packed.members([2, 0]), [1, 2, 3, 4, 0])
+    assert packed.members([]).size == 0
+    assert packed[1].units == ["5"]
+
+
+def test_supergeo_set_from_objects_maps_unit_ids_to_positions():
+    """With the unit table's IDs, members() returns unit positions; without them it refuses."""
+    supergeos = [
+        Supergeo(id="a", units=["7", "3"], response=1.0, spend=1.0, covariates={}),
+        Supergeo(id="b", units=["5"], response=2.0, spend=2.0, covariates={}),
+    ]
+    table_ids = [str(i) for i in range(10)]
+    packed = SupergeoSet.from_supergeos(supergeos, unit_ids=table_ids)
+    np.testing.assert_array_equal(packed.members([1, 0]), [5, 7, 3])
+    assert packed[0].units == ["7", "3"]
+
+    unindexed = SupergeoSet.from_supergeos(supergeos)
+    assert not unindexed.positions_known and unindexed[1].units == ["5"]
+    with pytest.raises(ValueError):
+        unindexed.members([1])
+    with pytest.raises(ValueError):
+        SupergeoSet.from_supergeos(supergeos, unit_ids=["3", "5"])
+
+
+def test_solver_accepts_set_and_list_alike():
+    """The solver sees the same feature matrix from a SupergeoSet or a Supergeo list."""
+    supergeos = make_supergeo_list()
+    from_list = SupergeoSolver(supergeos)
+    from_set = SupergeoSolver(SupergeoSet.from_supergeos(supergeos))
+
+    assert from_list.features == from_set.features
+    np.testing.assert_array_equal(from_list.X, from_set.X)
+
+
+def test_geo_table_matches_unit_list():
+    """Synthetic data as a table holds the same values as the GeoUnit list."""
+    units = generate_synthetic_data(n_units=50, seed=7)
+    table = generate_synthetic_data(n_units=50, seed=7, as_table=True)
+
+    packed = GeoTable.from_units(units)
+    np.testing.assert_array_equal(packed.feature_matrix(), table.feature_matrix())
+    np.testing.assert_array_equal(packed.truth["true_tau"], table.truth["true_tau"])
+    assert table.coords.shape == (50, 2)
+
+    np.testing.assert_array_equal(
+        table.feature_matrix(np.float32),
+        np.stack([u.to_feature_vector(table.covariate_names) for u in units])
+    )
+    unpacked = table.to_units()
+    assert unpacked[3].covariates == units[3].covariates
+    assert unpacked[3].true_tau == units[3].true_tau
+
+
+def test_geo_table_frame_round_trip():
+    """DataFrame ingestion keeps covariates, coordinates and truth columns apart."""
+    table = generate_synthetic_data(n_units=20, seed=1, as_table=True)
+    df = table.to_frame()
+    back = GeoTable.from_frame(df, coord_cols=["coord_0", "coord_1"], truth_cols=["true_tau", "latent_u"])
+
+    assert back.covariate_names == table.covariate_names
+    np.testing.assert_array_equal(back.feature_matrix(), table.feature_matrix())
+    np.testing.assert_array_equal(back.coords, table.coords)
+
+
+def test_candidate_generator_accepts_table_and_list_alike():
+    """Stage 1 gives the same partition from a GeoTable or a GeoUnit list."""
+    units = generate_synthetic_data(n_units=60, seed=2)
+    table = generate_synthetic_data(n_units=60, seed=2, as_table=True)
+
+    from_list = CandidateGenerator(units, method="pca").generate_supergeos(6)
+    from_table = CandidateGenerator(table, method="pca").generate_supergeos(6)
+
+    np.testing.assert_array_equal(from_list.X, from_table.X)
+    np.testing.assert_array_equal(from_list.unit_indices, from_table.unit_indices)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
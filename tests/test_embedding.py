@@ -0,0 +1,118 @@
+"""Unit tests for streaming normalization and out-of-core PCA embeddings."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.design import embedding
+from osd.design.embedding import iter_chunks, knn_graph, pca_embeddings, streaming_moments
+from osd.design.candidate_generation import CandidateGenerator
+from osd.utils.synthetic_data import generate_synthetic_data
+
+
+def low_rank_features(n_rows=1200, n_features=60, seed=0):
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(size=(3, n_features)) * np.array([8.0, 4.0, 2.0])[:, None]
+    return rng.normal(size=(n_rows, 3)) @ loadings + 0.05 * rng.normal(size=(n_rows, n_features)) + 50.0
+
+
+def test_iter_chunks_merges_short_tail():
+    assert [(s.start, s.stop) for s in iter_chunks(10, 4)] == [(0, 4), (4, 8), (8, 10)]
+    assert [(s.start, s.stop) for s in iter_chunks(10, 4, min_size=3)] == [(0, 4), (4, 10)]
+
+
+def test_streaming_moments_on_memmap(tmp_path):
+    X = low_rank_features()
+    mm = np.memmap(tmp_path / "features.dat", dtype=np.float64, mode="w+", shape=X.shape)
+    mm[:] = X
+    mean, std = streaming_moments(mm, chunk_size=257)
+    np.testing.assert_allclose(mean, X.mean(axis=0))
+    np.testing.assert_allclose(std, X.std(axis=0))
+
+
+@pytest.mark.parametrize("solver", ["randomized", "incremental"])
+def test_pca_solvers_recover_exact_components(solver):
+    X = low_rank_features()
+    exact = pca_embeddings(X, 3, solver="auto")
+    approx = pca_embeddings(X, 3, solver=solver, chunk_size=250)
+    for c in range(3):
+        assert abs(np.corrcoef(exact[:, c], approx[:, c])[0, 1]) > 0.999
+
+
+def test_generator_embeds_external_features(tmp_path):
+    table = generate_synthetic_data(n_units=1200, seed=0, as_table=True)
+    X = low_rank_features()
+    mm = np.memmap(tmp_path / "features.dat", dtype=np.float64, mode="w+", shape=X.shape)
+    mm[:] = X
+
+    generator = CandidateGenerator(table, embedding_dim=8, features=mm, pca_solver="incremental", chunk_size=300)
+    assert generator.train_embeddings().shape == (1200, 8)
+    assert generator.X_norm.shape == X.shape
+    with pytest.raises(ValueError):
+        CandidateGenerator(table, features=X[:10])
+
+
+def test_knn_graph_self_loops():
+    X = low_rank_features(n_rows=200)
+    with_self = knn_graph(X, 5, include_self=True)
+    without_self = knn_graph(X, 5)
+    assert with_self.diagonal().sum() == 200 and without_self.diagonal().sum() == 0
+    assert np.all(np.diff(with_self.indptr) == 5) and np.all(np.diff(without_self.indptr) == 5)
+    with pytest.raises(ValueError):
+        knn_graph(X, 5, backend="faiss")
+
+
+@pytest.mark.parametrize("solver", ["lobpcg", "amg"])
+def test_spectral_solver_with_eigenvector_cap(solver):
+    if solver == "amg":
+        pytest.importorskip("pyamg")
+    table = generate_synthetic_data(n_units=400, seed=0, as_table=True)
+    generator = CandidateGenerator(table, method="spectral", spectral_solver=solver, spectral_components=4)
+    embeddings = generator.train_embeddings()
+    assert embeddings.shape == (400, 4)
+    assert np.all(np.isfinite(embeddings))
+    with pytest.raises(ValueError):
+        CandidateGenerator(table, spectral_solver="dense")
+
+
+def test_knn_graph_cache_shared_across_generators():
+    """Spectral and connectivity graphs on the same data are built once and reused."""
+    from sklearn.neighbors import kneighbors_graph
+
+    embedding.clear_knn_cache()
+    table = generate_synthetic_data(n_units=300, seed=0, as_table=True)
+    first = CandidateGenerator(table, method="spectral")
+    first.train_embeddings()
+    assert len(embedding._KNN_CACHE) == 1
+
+    second = CandidateGenerator(table, method="spectral")
+    graph = knn_graph(second.X_norm, 10, include_self=True)
+    assert graph is next(iter(embedding._KNN_CACHE.values()))
+    expected = kneighbors_graph(second.X_norm, 10, mode="connectivity", include_self=True)
+    assert (graph != expected).nnz == 0
+
+    # A different k or content is a different entry
+    knn_graph(second.X_norm, 5, include_self=True)
+    knn_graph(second.X_norm[::-1], 10, include_self=True)
+    assert len(embedding._KNN_CACHE) == 3
+    embedding.clear_knn_cache()
+
+
+def test_nndescent_backend_matches_exact_layout():
+    pytest.importorskip("pynndescent")
+    X = low_rank_features(n_rows=300)
+    graph = knn_graph(X, 6, include_self=True, backend="nndescent", cache=False)
+    exact = knn_graph(X, 6, include_self=True, cache=False)
+    assert graph.shape == exact.shape
+    assert np.all(np.diff(graph.indptr) == 6) and graph.diagonal().sum() == 300
+    # Approximate neighbours agree with exact ones for nearly every entry
+    assert graph.multiply(exact).nnz >= 0.9 * exact.nnz
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+"""Unit tests for the GraphSAGE model and contrastive loss."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+from scipy import sparse
+
+# GNN embeddings are an optional extra (pip install osd[gnn])
+torch = pytest.importorskip("torch")
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.design.embedding import knn_graph
+from osd.models.gnn import ContrastiveLoss, GraphSAGE, node_degree, sample_blocks, sparse_adjacency
+from osd.design import candidate_generation
+from osd.design.candidate_generation import CandidateGenerator, _fit_epochs
+from osd.utils.synthetic_data import generate_synthetic_data
+
+
+def make_graph(n=300, k=6, seed=0):
+    X = np.random.default_rng(seed).normal(size=(n, 4)).astype(np.float32)
+    adj = knn_graph(X, k, include_self=True, cache=False)
+    return torch.tensor(X), adj
+
+
+def test_sparse_forward_matches_dense():
+    x, adj = make_graph()
+    sparse, dense = sparse_adjacency(adj), torch.tensor(adj.toarray(), dtype=torch.float32)
+    torch.manual_seed(0)
+    model = GraphSAGE(4, 16, 8).eval()
+
+    assert torch.allclose(node_degree(sparse), node_degree(dense))
+    assert torch.allclose(model(x, sparse, node_degree(sparse)), model(x, dense), atol=1e-6)
+
+
+def test_sparse_loss_matches_dense():
+    x, adj = make_graph()
+    sparse, dense = sparse_adjacency(adj), torch.tensor(adj.toarray(), dtype=torch.float32)
+    torch.manual_seed(0)
+    embeddings = GraphSAGE(4, 16, 8).eval()(x, dense)
+    criterion = ContrastiveLoss()
+
+    torch.manual_seed(1)
+    dense_loss = criterion(embeddings, dense)
+    torch.manual_seed(1)
+    sparse_loss = criterion(embeddings, sparse)
+    assert sparse_loss.item() == pytest.approx(dense_loss.item(), rel=1e-6)
+
+
+def test_loss_caches_edges_and_excludes_neighbour_negatives():
+    """On a complete graph every negative is a neighbour, leaving only the positive term."""
+    n = 20
+    adj = sparse_adjacency(sparse.csr_matrix(np.ones((n, n), dtype=np.float32)))
+    embeddings = torch.nn.functional.normalize(torch.randn(n, 4), dim=1)
+    criterion = ContrastiveLoss()
+
+    loss = criterion(embeddings, adj)
+    pos, keys = criterion.edges(adj)
+    assert criterion.edges(adj)[0] is pos
+    assert len(pos) == n * n and torch.all(keys[1:] > keys[:-1])
+    expected = torch.mean(torch.nn.functional.pairwise_distance(embeddings[pos[:, 0]], embeddings[pos[:, 1]]) ** 2)
+    assert loss.item() == pytest.approx(expected.item(), rel=1e-6)
+
+
+def test_chunked_inference_and_full_fanout_blocks_match_forward():
+    x, adj = make_graph()
+    adj = adj.tocsr()
+    torch.manual_seed(0)
+    model = GraphSAGE(4, 16, 8).eval()
+    with torch.no_grad():
+        full = model(x, sparse_adjacency(adj))
+        assert torch.allclose(model.inference(x, adj, chunk_size=70), full, atol=1e-6)
+
+        # A fan-out at least the degree keeps every neighbour, so blocks are exact
+        seeds = np.array([3, 17, 42, 250])
+        input_nodes, blocks = sample_blocks(adj.indptr, adj.indices, seeds, (6, 6), np.random.default_rng(0))
+        assert np.array_equal(input_nodes[:len(seeds)], seeds)
+        assert torch.allclose(model.forward_blocks(x[torch.from_numpy(input_nodes)], blocks), full[seeds], atol=1e-6)
+
+
+def test_sampled_blocks_respect_fanout():
+    x, adj = make_graph()
+    adj = adj.tocsr()
+    seeds = np.arange(0, 300, 7)
+    input_nodes, blocks = sample_blocks(adj.indptr, adj.indices, seeds, (2, 3), np.random.default_rng(1))
+    assert [n_dst for _, _, n_dst in blocks][-1] == len(seeds)
+    # Every node has at least 6 neighbours, so each keeps exactly the fan-out
+    assert torch.all(blocks[-1][1] == 3) and torch.all(blocks[0][1] == 2)
+    # The sources of the first block are its own destinations plus new nodes
+    assert blocks[0][0].shape == (blocks[0][2], len(input_nodes))
+    assert len(np.unique(input_nodes)) == len(input_nodes)
+
+
+def test_valid_negatives_masks_neighbours():
+    adj = sparse_adjacency(sparse.csr_matrix(np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]], dtype=float)))
+    _, edge_keys = ContrastiveLoss().edges(adj)
+    valid = ContrastiveLoss.valid_negatives(edge_keys, torch.tensor([0, 1]), torch.tensor([[1, 1], [2, 0]]), 3)
+    assert valid.tolist() == [[False, True], [True, False]]
+
+
+def test_minibatch_gnn_training_is_seeded():
+    table = generate_synthetic_data(n_units=400, seed=0, as_table=True)
+    runs = []
+    for _ in range(2):
+        torch.manual_seed(0)
+        generator = CandidateGenerator(table, method="gnn", embedding_dim=8, gnn_batch_size=64, gnn_fanouts=(5, 5))
+        runs.append(generator.train_embeddings(epochs=2))
+    assert runs[0].shape == (400, 8)
+    assert np.allclose(np.linalg.norm(runs[0], axis=1), 1.0, atol=1e-5)
+    assert np.array_equal(runs[0], runs[1])
+
+
+def test_fit_epochs_stopping_rules(monkeypatch):
+    # Plateau: the loss stops improving after epoch 3
+    losses = iter([5.0, 4.0, 3.0, 3.0, 3.0, 3.0, 3.0, 3.0])
+    info = _fit_epochs(lambda: next(losses), 8, patience=2, tol=1e-3, time_budget=None)
+    assert info.stop_reason == "plateau" and info.epochs_run == 5 and info.final_loss == 3.0
+
+    # No stopping rule: every epoch runs
+    info = _fit_epochs(lambda: 1.0, 4, patience=None, tol=1e-3, time_budget=None)
+    assert info.stop_reason == "max_epochs" and info.epochs_run == 4
+
+    # Budget: stops before an epoch that would overrun it (0.25s epochs on a fake clock)
+    clock = [0.0]
+    monkeypatch.setattr(candidate_generation.time, "time", lambda: clock[0])
+
+    def run_epoch():
+        clock[0] += 0.25
+        return 1.0
+
+    info = _fit_epochs(run_epoch, 100, patience=None, tol=1e-3, time_budget=1.0)
+    assert info.stop_reason == "time_budget" and info.epochs_run == 4
+
+
+def test_gnn_training_info_and_thread_restore():
+    table = generate_synthetic_data(n_units=200, seed=0, as_table=True)
+    threads = torch.get_num_threads()
+    generator = CandidateGenerator(table, method="gnn", embedding_dim=8, num_threads=1)
+    generator.train_embeddings(epochs=50, patience=3, tol=0.5)
+
+    info = generator.training_info
+    assert info.num_threads == 1 and torch.get_num_threads() == threads
+    assert info.stop_reason == "plateau" and info.epochs_run < 50
+    assert set(info.to_dict()) == {"epochs_run", "seconds_per_epoch", "final_loss", "stop_reason", "num_threads"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
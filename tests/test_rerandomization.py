@@ -0,0 +1,56 @@
+"""Unit tests for the vectorized rerandomization design."""
+
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.design.balance import batch_smd
+from osd.design.rerandomization import draw_assignments, rerandomize
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(11)
+    return rng.normal(size=(60, 4)) @ rng.normal(size=(4, 4))
+
+
+def test_draws_have_exact_cardinality():
+    """Every draw treats exactly n_treatment units."""
+    mask = draw_assignments(np.random.default_rng(0), 500, 30, 12)
+    assert mask.shape == (500, 30)
+    assert np.all(mask.sum(axis=1) == 12)
+
+
+def test_mahalanobis_draws_pass_threshold(features):
+    """Accepted draws respect the threshold, and the default one follows acceptance_prob."""
+    result = rerandomize(features, 30, n_accept=40, acceptance_prob=0.05, batch_size=1000, seed=0)
+
+    assert result.n_accepted == 40
+    assert np.all(result.scores <= result.threshold)
+    assert np.all(result.assignments.sum(axis=1) == 30)
+    assert 0.01 < result.acceptance_rate < 0.2
+
+
+def test_max_smd_scores_match_batch_smd(features):
+    """max_smd scores are the largest absolute SMD of each accepted draw."""
+    result = rerandomize(features, 25, n_accept=10, criterion="max_smd", threshold=0.2, seed=1)
+    smd, _ = batch_smd(result.assignments, features)
+
+    np.testing.assert_allclose(result.scores, np.abs(smd).max(axis=1))
+    assert np.all(result.scores <= 0.2)
+
+
+def test_seed_is_reproducible(features):
+    """The same seed and batch size give the same accepted draws."""
+    a = rerandomize(features, 30, n_accept=5, batch_size=64, seed=3)
+    b = rerandomize(features, 30, n_accept=5, batch_size=64, seed=3)
+    np.testing.assert_array_equal(a.assignments, b.assignments)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
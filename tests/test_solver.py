@@ -0,0 +1,305 @@
+"""Unit tests for the Stage 2 assignment solver."""
+
+import multiprocessing
+import time
+import numpy as np
+import pytest
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from scipy import sparse
+
+# Add src directory to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from osd.design.solver import SupergeoSolver, Supergeo, SolveResult
+from osd.design import heuristic
+from osd.design.heuristic import balance_objective, swap_search
+from osd.design.backends import BACKENDS, BackendResult, MILPBackend, TIME_LIMIT, get_backend
+
+
+def make_supergeos(n=20, seed=0):
+    """Small random partition with skewed, correlated features."""
+    rng = np.random.default_rng(seed)
+    supergeos = []
+    for i in range(n):
+        response = rng.lognormal(10, 1.0)
+        supergeos.append(Supergeo(
+            id=f"sg_{i}",
+            units=[str(i)],
+            response=response,
+            spend=0.1 * response * rng.uniform(0.8, 1.2),
+            covariates={"population": rng.lognormal(9, 0.5), "income": rng.normal(5e4, 1e4)}
+        ))
+    return supergeos
+
+
+def test_constraint_matrices_are_sparse_and_cached():
+    """The MILP constraint blocks are CSR and built only once per solver."""
+    solver = SupergeoSolver(make_supergeos())
+    A_eq, A_ub = solver._constraint_matrices()
+    n_features = len(solver.features)
+
+    assert sparse.isspmatrix_csr(A_eq) and sparse.isspmatrix_csr(A_ub)
+    assert A_ub.shape == (2 * n_features, solver.n + n_features)
+    assert solver._constraint_matrices()[1] is A_ub
+
+
+def test_constraint_matrices_match_dense_formulation():
+    """Sparse rows encode +/-X_norm^T alongside -I on the deviation variables."""
+    solver = SupergeoSolver(make_supergeos())
+    _, A_ub = solver._constraint_matrices()
+    n_features = len(solver.features)
+    dense = A_ub.toarray()
+
+    np.testing.assert_allclose(dense[:n_features, :solver.n], solver.X_norm.T)
+    np.testing.assert_allclose(dense[n_features:, :solver.n], -solver.X_norm.T)
+    np.testing.assert_allclose(dense[:n_features, solver.n:], -np.eye(n_features))
+    np.testing.assert_allclose(dense[n_features:, solver.n:], -np.eye(n_features))
+
+
+def test_solve_respects_cardinality_across_calls():
+    """Repeated solves with different group sizes reuse the model and stay feasible."""
+    solver = SupergeoSolver(make_supergeos())
+    for n_treatment in (10, 8, 5):
+        indices = solver.solve(n_treatment, solver.n - n_treatment, time_limit=10)
+        assert len(indices) == n_treatment
+        assert len(set(indices)) == n_treatment
+
+
+def test_multi_partition_parallel_matches_serial():
+    """Process-parallel selection returns the same winner as the serial loop."""
+    partitions = [make_supergeos(n=12, seed=s) for s in range(4)]
+
+    serial = SupergeoSolver(partitions[0]).solve_multi_partition(
+        partitions, n_treatment=6, n_control=6, time_limit=10, n_jobs=1
+    )
+    parallel = SupergeoSolver(partitions[0]).solve_multi_partition(
+        partitions, n_treatment=6, n_control=6, time_limit=10, n_jobs=2
+    )
+
+    assert serial[0] == parallel[0]
+    assert serial[1] == parallel[1]
+    assert serial[2] == pytest.approx(parallel[2])
+
+
+@pytest.mark.parametrize("anneal", [False, True])
+def test_heuristic_respects_cardinality_and_beats_random(anneal):
+    """Swap search keeps group sizes and improves on a random assignment."""
+    solver = SupergeoSolver(make_supergeos(n=200, seed=3))
+    weights = solver._weight_vector()
+    target = solver.X_norm.sum(axis=0) * 0.5
+
+    indices = solver.solve_heuristic(100, 100, time_limit=0.5, anneal=anneal, seed=0)
+    assert len(indices) == 100 and len(set(indices)) == 100
+
+    mask = np.zeros(solver.n, dtype=bool)
+    mask[indices] = True
+    random_mask = np.zeros(solver.n, dtype=bool)
+    random_mask[np.random.default_rng(0).choice(solver.n, 100, replace=False)] = True
+
+    assert balance_objective(solver.X_norm, weights, mask, target) < \
+        balance_objective(solver.X_norm, weights, random_mask, target)
+
+
+def test_swap_search_never_worsens_initial_assignment():
+    """The returned objective is no worse than the starting point's."""
+    solver = SupergeoSolver(make_supergeos(n=50, seed=4))
+    weights = solver._weight_vector()
+    target = solver.X_norm.sum(axis=0) * 0.5
+    initial = np.zeros(solver.n, dtype=bool)
+    initial[:25] = True
+
+    mask, cost = swap_search(solver.X_norm, weights, 25, 25, time_limit=0.5, initial=initial)
+
+    assert mask.sum() == 25
+    assert cost == pytest.approx(balance_objective(solver.X_norm, weights, mask, target))
+    assert cost <= balance_objective(solver.X_norm, weights, initial, target)
+
+
+@pytest.mark.parametrize("anneal", [False, True])
+def test_swap_search_bounds_greedy_start_at_scale(anneal, monkeypatch):
+    """On 50k units the greedy start hands its unplaced units to the block fill."""
+    fills = []
+    block_fill = heuristic._block_fill
+    monkeypatch.setattr(heuristic, "_block_fill", lambda *args: fills.append(len(args[2])) or block_fill(*args))
+    rng = np.random.default_rng(0)
+    X = rng.lognormal(size=(50000, 6))
+    weights = np.ones(6)
+
+    start = time.perf_counter()
+    mask, cost = swap_search(X, weights, 25000, 25000, time_limit=0.05, anneal=anneal, seed=0)
+    elapsed = time.perf_counter() - start
+
+    assert mask.sum() == 25000
+    assert len(fills) == 1 and fills[0] > 0
+    assert cost == pytest.approx(balance_objective(X, weights, mask, X.sum(axis=0) * 0.5))
+    # Loose bound for loaded runners; the block fill above shows the deadline was honoured
+    assert elapsed < 1.0
+
+
+def test_greedy_assignment_block_fill_keeps_cardinality():
+    """A deadline already past places every unit by the block fill, still with exact group sizes."""
+    X = np.random.default_rng(1).lognormal(size=(1000, 4))
+    for n_treatment in (0, 1, 300, 500, 999, 1000):
+        mask = heuristic.greedy_assignment(X, np.ones(4), n_treatment, n_treatment / 1000, deadline=0.0)
+        assert mask.sum() == n_treatment
+
+
+def test_build_model_relaxation_drops_integrality():
+    """The neutral model marks only assignment variables integer; relaxed() clears them."""
+    solver = SupergeoSolver(make_supergeos())
+    model = solver.build_model(10, 10)
+
+    assert model.n_vars == solver.n + len(solver.features)
+    assert model.integrality[:solver.n].all() and not model.integrality[solver.n:].any()
+    assert not model.relaxed().integrality.any()
+
+
+def _solve_in_worker(backend_name, model, time_limit):
+    return get_backend(backend_name).solve(model, time_limit)
+
+
+@pytest.mark.parametrize("backend_name", sorted(BACKENDS))
+def test_backends_agree_with_scipy(backend_name):
+    """Every installed backend reaches the scipy/HiGHS optimum on the same model."""
+    if not BACKENDS[backend_name].is_available():
+        pytest.skip(f"{backend_name} is not installed")
+    solver = SupergeoSolver(make_supergeos(n=16, seed=5))
+    model = solver.build_model(8, 8)
+    reference = get_backend("scipy").solve(model, 10)
+
+    # Solver libraries can clash when loaded together, so each runs in a fresh process
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        result = pool.submit(_solve_in_worker, backend_name, model, 10).result()
+
+    assert result.success
+    assert int(round(result.x[:solver.n].sum())) == 8
+    assert result.objective == pytest.approx(reference.objective, rel=1e-3, abs=1e-6)
+
+
+def test_cbc_message_matches_status():
+    """A CBC run stopped by the time limit is not reported as optimal in its message."""
+    if not BACKENDS["cbc"].is_available():
+        pytest.skip("cbc is not installed")
+    solver = SupergeoSolver(make_supergeos(n=200, seed=0))
+    result = get_backend("cbc").solve(solver.build_model(100, 100), 0.5)
+
+    assert result.status in ("optimal", TIME_LIMIT)
+    assert ("Optimal" in result.message) == (result.status == "optimal")
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        get_backend("gurobi")
+
+
+def test_solve_result_reports_telemetry():
+    """return_result=True carries status, objective, timings and HiGHS gap/bound."""
+    solver = SupergeoSolver(make_supergeos())
+    result = solver.solve(10, 10, time_limit=10, return_result=True)
+
+    assert isinstance(result, SolveResult)
+    assert result.status == "optimal" and not result.fallback_used
+    assert result.backend == "scipy"
+    assert len(result.treatment_indices) == 10
+    assert result.objective >= 0 and result.dual_bound is not None
+    assert result.objective >= result.dual_bound - 1e-6
+    assert 0 <= result.build_time <= result.wall_time
+
+
+class _NoSolutionBackend(MILPBackend):
+    name = "no_solution"
+
+    def solve(self, model, time_limit):
+        return BackendResult(status=TIME_LIMIT, x=None, objective=None, message="time limit reached")
+
+
+def test_solve_result_flags_fallback(capsys):
+    """A backend without a solution triggers the heuristic and is reported as a fallback."""
+    solver = SupergeoSolver(make_supergeos())
+    result = solver.solve(10, 10, backend=_NoSolutionBackend(), return_result=True)
+
+    assert result.fallback_used and result.status == TIME_LIMIT
+    assert result.message == "time limit reached" and capsys.readouterr().out == ""
+    assert len(result.treatment_indices) == 10
+    mask = np.zeros(solver.n, dtype=bool)
+    mask[result.treatment_indices] = True
+    target = solver.X_norm.sum(axis=0) * 0.5
+    assert result.objective == pytest.approx(
+        balance_objective(solver.X_norm, solver._weight_vector(), mask, target))
+
+
+def test_multi_partition_collects_results():
+    """solve_multi_partition keeps one SolveResult per partition with its cost."""
+    partitions = [make_supergeos(n=12, seed=s) for s in range(3)]
+    solver = SupergeoSolver(partitions[0])
+    best_idx, _, best_cost = solver.solve_multi_partition(partitions, 6, 6, time_limit=10)
+
+    assert len(solver.partition_results) == 3
+    assert solver.partition_results[best_idx].cost == pytest.approx(best_cost)
+    assert all(r.status == "optimal" for r in solver.partition_results)
+
+
+def test_multi_partition_finalists_keep_heuristic_results():
+    """Only n_finalists partitions get a MILP solve; the rest keep their screening result."""
+    partitions = [make_supergeos(n=12, seed=s) for s in range(5)]
+    solver = SupergeoSolver(partitions[0])
+    _, _, best_cost = solver.solve_multi_partition(partitions, 6, 6, time_limit=10, n_finalists=2)
+
+    statuses = [r.status for r in solver.partition_results]
+    assert statuses.count("heuristic") == 3
+    assert best_cost == min(r.cost for r in solver.partition_results)
+
+
+def make_mirrored_supergeos(n_pairs=6, seed=0):
+    """Partition of identical pairs, so splitting every pair balances it exactly."""
+    return [Supergeo(id=f"sg_{i}_{k}", units=[f"{i}_{k}"], response=sg.response, spend=sg.spend,
+                     covariates=sg.covariates)
+            for i, sg in enumerate(make_supergeos(n=n_pairs, seed=seed)) for k in range(2)]
+
+
+def test_multi_partition_prune_stops_after_exact_balance():
+    """Once a partition is balanced exactly, no later partition can beat it and is skipped."""
+    partitions = [make_mirrored_supergeos(seed=0)] + [make_supergeos(n=12, seed=s) for s in range(1, 4)]
+    solver = SupergeoSolver(partitions[0])
+    best_idx, _, best_cost = solver.solve_multi_partition(partitions, 6, 6, time_limit=10, prune=True)
+
+    assert best_idx == 0 and best_cost == pytest.approx(0.0, abs=1e-9)
+    assert solver.partition_results[0].status == "optimal"
+    assert solver.partition_results[1:] == [None] * 3
+
+
+def test_multi_partition_prune_without_exact_balance_solves_every_partition():
+    """prune only exits early; without an exactly balanced partition the result is unchanged."""
+    partitions = [make_supergeos(n=12, seed=s) for s in range(3)]
+    plain = SupergeoSolver(partitions[0]).solve_multi_partition(partitions, 6, 6, time_limit=10)
+    solver = SupergeoSolver(partitions[0])
+    pruned = solver.solve_multi_partition(partitions, 6, 6, time_limit=10, prune=True)
+
+    assert pruned[0] == plain[0] and pruned[2] == pytest.approx(plain[2])
+    assert all(r.status == "optimal" for r in solver.partition_results)
+
+
+def test_multi_partition_time_budget_bounds_latency():
+    """A global budget caps the call even when single solves would hit time_limit."""
+    partitions = [make_supergeos(n=30, seed=s) for s in range(6)]
+    solver = SupergeoSolver(partitions[0])
+
+    start = time.perf_counter()
+    best_idx, indices, best_cost = solver.solve_multi_partition(
+        partitions, 15, 15, time_limit=30, time_budget=3.0
+    )
+    elapsed = time.perf_counter() - start
+
+    # Without the budget one partition alone may use its 30s time_limit
+    assert elapsed < 30
+    assert all(r.solve_time <= 3.0 for r in solver.partition_results)
+    assert len(indices) == 15
+    assert all(r is not None for r in solver.partition_results)
+    assert best_cost == min(r.cost for r in solver.partition_results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])